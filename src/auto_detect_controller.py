@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 
@@ -8,6 +9,8 @@ sys.path.append(parent_dir)
 from typing import Dict, Callable, Optional
 from services.tello_command_dispatcher import TelloCommandDispatcher
 from services.tello_connector import TelloConnector
+from services.rc_transmitter import RcTransmitter
+from services.realtime_loop import RealtimeLoop
 from djitellopy import Tello
 from joysticks.pygame_connector import PyGameConnector
 from services.tello_controller import TelloController
@@ -53,6 +56,10 @@ def get_controller_type(platform: str, joystick_name: str) -> GameControllerType
 
 def main(
     log_level: int = logging.DEBUG,
+    cadence_secs: float = 0.02,
+    rc_rate_hz: float = 20,
+    max_state_age_secs: float = 0.5,
+    host: str = Tello.TELLO_IP,
 ) -> None:
     logging.basicConfig(level=log_level)
     LOGGER = logging.getLogger(__name__)
@@ -75,19 +82,37 @@ def main(
         LOGGER.info("Defaulting to Keyboard Controller")
         controller = KeyboardControlAdapter(PyGameConnector())
 
-    tello = Tello()
+    tello = Tello(host)
     tello_service = TelloConnector(tello)
     tello_service.connect()
 
     dispatcher = TelloCommandDispatcher(tello_service)
+    transmitter = RcTransmitter(dispatcher, rc_rate_hz, max_state_age_secs)
+    transmitter.start()
 
-    while True:
+    loop = RealtimeLoop(cadence_secs, name="controller")
+
+    def poll_controller() -> None:
         try:
             control_state = controller.get_state()
-            dispatcher.send_commands(control_state)
+            transmitter.submit(control_state)
         except Exception as e:
             LOGGER.error(e, "Error Issuing command")
 
+    try:
+        loop.run(poll_controller)
+    finally:
+        transmitter.stop()
+        LOGGER.info(f"Controller loop stats: {loop.get_stats()}")
+        LOGGER.info(f"RC transmitter stats: {transmitter.get_stats()}")
+
 
 if __name__ == "__main__":
-    main()
+    args = argparse.ArgumentParser()
+    args.add_argument(
+        "--host",
+        default=Tello.TELLO_IP,
+        help=f"Specify the address of the drone or the simulator (default: {Tello.TELLO_IP})",
+    )
+    parsed_args = args.parse_args()
+    main(host=parsed_args.host)
@@ -0,0 +1,122 @@
+"""
+Runs face detection over a recorded video, one frame at a time and as batches.
+
+Prints the throughput of both and checks that the batch results match.
+
+Run from the src folder:
+    python benchmarks/batch_face_detection_benchmark.py flight.mp4 --identifier hog --workers 4
+"""
+
+import sys
+import os
+
+script_dir = os.path.dirname(__file__)
+parent_dir = os.path.join(script_dir, "..")
+sys.path.append(parent_dir)
+
+import argparse
+from typing import List
+
+import cv2
+
+from face_tracking.face_identifier import AbstractFaceIdentifier, BatchStats
+from face_tracking.image_compression_service import ImageCompressionService
+from face_tracking.open_cv_wrapper import OpenCvWrapper
+
+
+def create_identifier(name: str) -> AbstractFaceIdentifier:
+    open_cv = OpenCvWrapper()
+    if name == "haar":
+        from face_tracking.open_cv_face_identifier import OpenCvFaceIdentifier
+
+        return OpenCvFaceIdentifier(open_cv)
+
+    from face_tracking.recognition_face_identifier import RecognitionFaceIdentifier
+
+    return RecognitionFaceIdentifier(
+        open_cv, ImageCompressionService(open_cv), model=name  # type: ignore
+    )
+
+
+def main(
+    video_file: str,
+    identifier_name: str,
+    frames: int,
+    batch: int,
+    workers: int,
+    chunk_size: int,
+) -> None:
+    capture = cv2.VideoCapture(video_file)
+    images: List[cv2.typing.MatLike] = []
+    while len(images) < frames:
+        ok, image = capture.read()
+        if not ok:
+            break
+        images.append(image)
+    capture.release()
+    print(f"Loaded {len(images)} frames from {video_file}")
+
+    identifier = create_identifier(identifier_name)
+    single = AbstractFaceIdentifier.identify_faces_batch(identifier, images)
+    print(f"one by one: {single.stats.fps:.1f} fps")
+
+    # The pool and its loaded models are kept between batches, so only the first
+    # batch pays for starting the workers
+    total = BatchStats(0, 0.0)
+    faces = []
+    kwargs = {}
+    if identifier_name != "cnn":
+        # Only the pooled identifiers take these, the cnn model batches by itself
+        kwargs["chunk_size"] = chunk_size
+        if workers:
+            kwargs["workers"] = workers
+    for start in range(0, len(images), batch):
+        end = start + batch
+        result = identifier.identify_faces_batch(images[start:end], **kwargs)  # type: ignore
+        faces.extend(result.faces)
+        total = BatchStats(
+            total.frames + result.stats.frames,
+            total.secs + result.stats.secs,
+            result.stats.workers,
+        )
+        print(
+            f"batch of {result.stats.frames}: {result.stats.fps:.1f} fps with {result.stats.workers} workers"
+        )
+    print(f"batched: {total.fps:.1f} fps")
+    close = getattr(identifier, "close", None)
+    if close is not None:
+        close()
+
+    matches = all(
+        [tuple(box) for box in a] == [tuple(box) for box in b]
+        for a, b in zip(single.faces, faces)
+    )
+    print(f"results match: {matches}")
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser()
+    args.add_argument("video_file")
+    args.add_argument("--identifier", choices=["haar", "hog", "cnn"], default="hog")
+    args.add_argument("--frames", type=int, default=300)
+    args.add_argument(
+        "--batch", type=int, default=128, help="Frames per identify_faces_batch call"
+    )
+    args.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Pool processes, 0 for the CPU count (haar and hog only)",
+    )
+    args.add_argument(
+        "--chunk-size", type=int, default=8, help="Frames per task (haar and hog only)"
+    )
+    parsed_args = args.parse_args()
+    main(
+        parsed_args.video_file,
+        parsed_args.identifier,
+        parsed_args.frames,
+        parsed_args.batch,
+        parsed_args.workers,
+        parsed_args.chunk_size,
+    )
@@ -0,0 +1,106 @@
+"""
+Compares the cost of producing one control state per tick.
+
+- legacy: the previous unslotted dataclass with a fresh events list and validation
+- validated: a new slotted TelloControlState per tick, validated
+- trusted: a new slotted TelloControlState per tick without validation
+- in place: one TelloControlState reused with update(validate=False)
+
+Reports the time per tick and the bytes allocated per tick measured with tracemalloc.
+
+Run from the src folder:
+    python benchmarks/control_state_benchmark.py
+"""
+
+import sys
+import os
+
+script_dir = os.path.dirname(__file__)
+parent_dir = os.path.join(script_dir, "..")
+sys.path.append(parent_dir)
+
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, List
+
+from services.tello_controller import NO_EVENTS, TelloActionType, TelloControlState
+
+
+@dataclass
+class _LegacyControlState:
+    "The TelloControlState as it was before it became slotted."
+
+    MIN_VAL = -100
+    MAX_VAL = 100
+
+    right_velocity: int
+    forward_velocity: int
+    up_velocity: int
+    yaw_right_velocity: int
+    events: List[TelloActionType]
+
+    def __post_init__(self):
+        for name in (
+            "right_velocity",
+            "forward_velocity",
+            "up_velocity",
+            "yaw_right_velocity",
+        ):
+            value = getattr(self, name)
+            if not isinstance(value, int):
+                raise ValueError(f"Value needs to be an integer. Got {type(value)}")
+            if not (self.MIN_VAL <= value <= self.MAX_VAL):
+                raise ValueError(
+                    f"Value {value} for attribute '{name}' is out of range"
+                )
+
+
+def measure(label: str, tick: Callable[[int], object], ticks: int) -> None:
+    # Keep the results alive so allocations are not freed and reused mid measurement
+    kept: List[object] = []
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for i in range(1000):
+        kept.append(tick(i))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    bytes_per_tick = (after - before - sys.getsizeof(kept)) / 1000
+
+    start = time.perf_counter()
+    for i in range(ticks):
+        tick(i)
+    ns_per_tick = (time.perf_counter() - start) / ticks * 1e9
+    print(f"{label:<10} {ns_per_tick:8.0f} ns/tick {bytes_per_tick:8.0f} bytes/tick")
+
+
+def main(ticks: int) -> None:
+    def legacy(i: int) -> object:
+        return _LegacyControlState(i % 100, 0, -(i % 100), 0, [])
+
+    def validated(i: int) -> object:
+        return TelloControlState(i % 100, 0, -(i % 100), 0)
+
+    def trusted(i: int) -> object:
+        return TelloControlState.trusted(i % 100, 0, -(i % 100), 0)
+
+    shared = TelloControlState(0, 0, 0, 0)
+
+    def in_place(i: int) -> object:
+        return shared.update(i % 100, 0, -(i % 100), 0, NO_EVENTS, validate=False)
+
+    print(
+        f"Instance size: legacy {sys.getsizeof(_LegacyControlState(0, 0, 0, 0, [])) + sys.getsizeof({})} bytes "
+        f"(object + __dict__), slotted {sys.getsizeof(shared)} bytes"
+    )
+    measure("legacy", legacy, ticks)
+    measure("validated", validated, ticks)
+    measure("trusted", trusted, ticks)
+    measure("in place", in_place, ticks)
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser()
+    args.add_argument("--ticks", type=int, default=200_000)
+    main(args.parse_args().ticks)
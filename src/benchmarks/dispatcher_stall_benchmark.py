@@ -0,0 +1,118 @@
+"""
+Measures how long the RC loop stalls while discrete actions are dispatched.
+
+A fake connector makes takeoff, flips and land block for a configurable time, like
+the real drone does. The RC loop runs at a fixed rate and records the largest gap
+between two consecutive RC packets, once with the actions inline and once with the
+ActionExecutor.
+
+Run from the src folder:
+    python benchmarks/dispatcher_stall_benchmark.py
+"""
+
+import sys
+import os
+
+script_dir = os.path.dirname(__file__)
+parent_dir = os.path.join(script_dir, "..")
+sys.path.append(parent_dir)
+
+import argparse
+import time
+from typing import List, Optional
+
+from services.action_executor import ActionExecutor
+from services.tello_command_dispatcher import TelloCommandDispatcher
+from services.tello_controller import TelloActionType, TelloControlState
+
+
+class SlowActionConnector:
+    "Stands in for the TelloConnector. Discrete actions block like the real drone."
+
+    def __init__(self, action_secs: float):
+        self.action_secs = action_secs
+        self.rc_timestamps: List[float] = []
+        self._flying = False
+
+    def set_speed_cm_s(self, cm_s: int) -> None:
+        time.sleep(self.action_secs / 10)
+
+    def send_rc_control(self, *velocities: int) -> None:
+        self.rc_timestamps.append(time.monotonic())
+
+    def is_flying(self) -> bool:
+        return self._flying
+
+    def take_off(self) -> None:
+        time.sleep(self.action_secs)
+        self._flying = True
+
+    def land(self) -> None:
+        time.sleep(self.action_secs)
+        self._flying = False
+
+    def emergency_stop(self) -> None:
+        self._flying = False
+
+    def flip_forward(self) -> None:
+        time.sleep(self.action_secs)
+
+    flip_back = flip_left = flip_right = flip_forward
+
+
+def run(
+    executor: Optional[ActionExecutor],
+    action_secs: float,
+    rate_hz: float,
+    duration_secs: float,
+) -> dict:
+    connector = SlowActionConnector(action_secs)
+    dispatcher = TelloCommandDispatcher(connector, executor)  # type: ignore
+    # Send every tick so the gaps only come from blocking actions
+    dispatcher.rc_keepalive_secs = 0
+
+    script = {
+        0.1: [TelloActionType.TAKEOFF],
+        0.3: [TelloActionType.FLIP_FORWARD],
+        0.5: [TelloActionType.INCREASE_SPEED_CM_S],
+        0.7: [TelloActionType.LAND],
+    }
+    period = 1 / rate_hz
+    start = time.monotonic()
+    tick = 0
+    while time.monotonic() - start < duration_secs:
+        elapsed_ratio = (time.monotonic() - start) / duration_secs
+        events = []
+        for at in list(script):
+            if elapsed_ratio >= at:
+                events.extend(script.pop(at))
+        dispatcher.send_commands(TelloControlState(0, tick % 2, 0, 0, events))
+        tick += 1
+        time.sleep(max(0.0, start + tick * period - time.monotonic()))
+
+    gaps = [b - a for a, b in zip(connector.rc_timestamps, connector.rc_timestamps[1:])]
+    return {
+        "packets": len(connector.rc_timestamps),
+        "max_stall_ms": max(gaps) * 1000 if gaps else 0.0,
+        "stall_over_2x_period": sum(1 for gap in gaps if gap > 2 * period),
+    }
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser()
+    args.add_argument("--action-secs", type=float, default=1.0)
+    args.add_argument("--rate", type=float, default=50)
+    args.add_argument("--duration", type=float, default=8.0)
+    parsed_args = args.parse_args()
+
+    inline = run(None, parsed_args.action_secs, parsed_args.rate, parsed_args.duration)
+    print(f"Inline actions:     {inline}")
+
+    executor = ActionExecutor()
+    executor.start()
+    background = run(
+        executor, parsed_args.action_secs, parsed_args.rate, parsed_args.duration
+    )
+    executor.stop()
+    print(f"Background actions: {background}")
+    print(f"Executor stats:     {executor.get_stats()}")
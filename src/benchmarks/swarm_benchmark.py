@@ -0,0 +1,88 @@
+"""
+Drives a swarm of simulated drones through one TelloSwarmConnector.
+
+Measures how long it takes to collect the acknowledgements of every drone and how
+long one RC fan-out pass over all drones takes.
+
+Run from the src folder:
+    python benchmarks/swarm_benchmark.py --drones 20
+"""
+
+import sys
+import os
+
+script_dir = os.path.dirname(__file__)
+parent_dir = os.path.join(script_dir, "..")
+sys.path.append(parent_dir)
+
+import argparse
+import time
+
+from services.latency_histogram import LatencyHistogram
+from services.tello_swarm_connector import TelloSwarmConnector
+from simulator.tello_simulator import TelloSimulator
+
+
+def main(drones: int, rc_passes: int, rtt_ms: float, takeoff_secs: float) -> None:
+    simulators = [
+        TelloSimulator(
+            command_port=0,
+            state_port=0,
+            rtt_secs=rtt_ms / 1000,
+            command_durations_secs={"takeoff": takeoff_secs, "land": takeoff_secs},
+        ).start()
+        for _ in range(drones)
+    ]
+    swarm = TelloSwarmConnector([simulator.address for simulator in simulators])
+    try:
+        start = time.perf_counter()
+        connected = swarm.connect(timeout_secs=2)
+        print(
+            f"connect: {sum(connected)}/{drones} in {time.perf_counter() - start:.4f}s"
+        )
+
+        start = time.perf_counter()
+        flying = swarm.take_off()
+        print(f"takeoff: {sum(flying)}/{drones} in {time.perf_counter() - start:.4f}s")
+
+        fan_out = LatencyHistogram()
+        cpu_start = time.process_time()
+        for i in range(rc_passes):
+            vectors = [(0, i % 50, 0, d) for d in range(drones)]
+            start = time.perf_counter()
+            swarm.send_rc_control(vectors)
+            fan_out.record(time.perf_counter() - start)
+        cpu_secs = time.process_time() - cpu_start
+        print(
+            f"rc fan-out over {drones} drones: "
+            f"p50 {fan_out.percentile(50) * 1e6:.0f}us, "
+            f"p99 {fan_out.percentile(99) * 1e6:.0f}us, "
+            f"{cpu_secs / rc_passes * 1e6:.0f}us CPU per pass"
+        )
+
+        time.sleep(0.1)
+        received = sum(simulator.rc_received for simulator in simulators)
+        print(f"rc packets received by simulators: {received}/{swarm.rc_packets_sent}")
+
+        start = time.perf_counter()
+        landed = swarm.land()
+        print(f"land: {sum(landed)}/{drones} in {time.perf_counter() - start:.4f}s")
+    finally:
+        swarm.end()
+        for simulator in simulators:
+            simulator.stop()
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser()
+    args.add_argument("--drones", type=int, default=20)
+    args.add_argument("--rc-passes", type=int, default=1000)
+    args.add_argument("--rtt-ms", type=float, default=10)
+    args.add_argument("--takeoff-secs", type=float, default=0.5)
+    parsed_args = args.parse_args()
+    main(
+        parsed_args.drones,
+        parsed_args.rc_passes,
+        parsed_args.rtt_ms,
+        parsed_args.takeoff_secs,
+    )
@@ -0,0 +1,115 @@
+"""
+Replays a recorded H.264 elementary stream over local UDP into a VideoReceiver.
+
+A consumer that takes --consumer-ms per frame reads the frames, so the drop-to-latest
+policy can be watched when it falls behind. Prints the per frame decode time, the
+queue age and the age of every frame when the consumer picks it up.
+
+Record a stream from the drone or convert a video first, for example:
+    ffmpeg -i video.mp4 -c:v libx264 -bf 0 -g 30 -an -f h264 flight.h264
+
+Run from the src folder:
+    python benchmarks/video_receiver_benchmark.py flight.h264 --decode-threads 2 --consumer-ms 50
+"""
+
+import sys
+import os
+
+script_dir = os.path.dirname(__file__)
+parent_dir = os.path.join(script_dir, "..")
+sys.path.append(parent_dir)
+
+import argparse
+import socket
+import time
+
+from services.latency_histogram import LatencyHistogram
+from services.video_receiver import VideoReceiver
+from simulator.tello_simulator import TelloSimulator
+
+
+def main(
+    video_file: str,
+    secs: float,
+    fps: float,
+    decode_threads: int,
+    thread_type: str,
+    jitter_buffer_frames: int,
+    consumer_ms: float,
+) -> None:
+    receiver = VideoReceiver(
+        host="127.0.0.1",
+        port=0,
+        decode_threads=decode_threads,
+        thread_type=thread_type,
+        jitter_buffer_frames=jitter_buffer_frames,
+    ).start()
+    simulator = TelloSimulator(
+        command_port=0,
+        state_port=0,
+        video_port=receiver.address[1],
+        video_file=video_file,
+        fps=fps,
+        rtt_secs=0,
+    ).start()
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.settimeout(2)
+    try:
+        for command in ("command", "streamon"):
+            client.sendto(command.encode(), simulator.address)
+            client.recv(1024)
+
+        frame_age = LatencyHistogram()
+        consumed = 0
+        seq = 0
+        deadline = time.monotonic() + secs
+        while time.monotonic() < deadline:
+            decoded = receiver.wait_for_next_frame(seq, timeout=1)
+            if decoded is None:
+                continue
+            frame_age.record(time.monotonic() - decoded.timestamp)
+            seq = decoded.seq
+            consumed += 1
+            time.sleep(consumer_ms / 1000)
+
+        stats = receiver.get_stats()
+        print(f"consumed {consumed} frames, last seq {seq}")
+        print(
+            f"received {stats['frames_received']}, decoded {stats['frames_decoded']}, "
+            f"published {stats['frames_published']}, flushed {stats['frames_flushed']}, "
+            f"errors {stats['decode_errors']}"
+        )
+        for name, histogram in (
+            ("decode", receiver.decode_time),
+            ("queue age", receiver.queue_age),
+            ("frame age at consumer", frame_age),
+        ):
+            print(
+                f"{name}: p50 {histogram.percentile(50) * 1000:.2f}ms, "
+                f"p99 {histogram.percentile(99) * 1000:.2f}ms"
+            )
+    finally:
+        client.close()
+        simulator.stop()
+        receiver.stop()
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser()
+    args.add_argument("video_file", help="H.264 elementary stream to replay")
+    args.add_argument("--secs", type=float, default=10)
+    args.add_argument("--fps", type=float, default=30)
+    args.add_argument("--decode-threads", type=int, default=1)
+    args.add_argument("--thread-type", choices=["SLICE", "FRAME"], default="SLICE")
+    args.add_argument("--jitter-buffer-frames", type=int, default=4)
+    args.add_argument("--consumer-ms", type=float, default=0)
+    parsed_args = args.parse_args()
+    main(
+        parsed_args.video_file,
+        parsed_args.secs,
+        parsed_args.fps,
+        parsed_args.decode_threads,
+        parsed_args.thread_type,
+        parsed_args.jitter_buffer_frames,
+        parsed_args.consumer_ms,
+    )
@@ -6,10 +6,13 @@ parent_dir = os.path.join(script_dir, "..")
 sys.path.append(parent_dir)
 
 import argparse
-import time
 from typing import Callable, Dict, Literal
 from services.tello_command_dispatcher import TelloCommandDispatcher
 from services.tello_connector import TelloConnector
+from services.rc_transmitter import RcTransmitter
+from services.realtime_loop import RealtimeLoop
+from services.action_executor import ActionExecutor
+from services.tello_frontend import FrontEnd
 from djitellopy import Tello
 from joysticks.pygame_connector import PyGameConnector
 from joysticks.game_controller_type import GameControllerType
@@ -45,6 +48,10 @@ def main(
     ],
     cadence_secs: float,
     log_level: str,
+    rc_rate_hz: float = 20,
+    max_state_age_secs: float = 0.5,
+    host: str = Tello.TELLO_IP,
+    video: bool = False,
 ) -> None:
     logging.basicConfig(level=log_level)
     LOGGER = logging.getLogger(__name__)
@@ -59,20 +66,49 @@ def main(
     except KeyError:
         raise ValueError(f"Unsupported controller type: {ctrl_type}")
 
-    tello = Tello()
+    tello = Tello(host)
     tello_service = TelloConnector(tello)
     tello_service.connect()
 
-    dispatcher = TelloCommandDispatcher(tello_service)
+    # Takeoff, land and flips run in the background so the RC stream keeps flowing
+    executor = ActionExecutor()
+    executor.start()
+    dispatcher = TelloCommandDispatcher(tello_service, executor)
 
-    while True:
-        time.sleep(cadence_secs)
+    if video:
+        # The controller, the RC stream and the video display run as separate stages
+        tello_service.streamon()
+        frontend = FrontEnd(
+            dispatcher, tello_service, controller, rc_rate_hz, max_state_age_secs
+        )
+        try:
+            frontend.run(cadence_secs)
+        finally:
+            executor.stop()
+        return
+
+    # The RC packets go out at a fixed rate, independent of the controller polling.
+    # If the controller stops delivering states the drone hovers instead
+    transmitter = RcTransmitter(dispatcher, rc_rate_hz, max_state_age_secs)
+    transmitter.start()
+
+    loop = RealtimeLoop(cadence_secs, name="controller")
+
+    def poll_controller() -> None:
         try:
             control_state = controller.get_state()
-            dispatcher.send_commands(control_state)
+            transmitter.submit(control_state)
         except Exception as e:
             LOGGER.error(e, "Error Issuing command")
 
+    try:
+        loop.run(poll_controller)
+    finally:
+        transmitter.stop()
+        executor.stop()
+        LOGGER.info(f"Controller loop stats: {loop.get_stats()}")
+        LOGGER.info(f"RC transmitter stats: {transmitter.get_stats()}")
+
 
 if __name__ == "__main__":
     args = argparse.ArgumentParser()
@@ -88,6 +124,28 @@ if __name__ == "__main__":
         default=0.1,
         help="Specify the cadence in seconds (default: 0.1)",
     )
+    args.add_argument(
+        "--rc-rate",
+        type=float,
+        default=20,
+        help="Specify the rate in Hz at which RC commands are sent (default: 20)",
+    )
+    args.add_argument(
+        "--max-state-age",
+        type=float,
+        default=0.5,
+        help="Send a zero RC vector when the controller state is older than this many seconds (default: 0.5)",
+    )
+    args.add_argument(
+        "--host",
+        default=Tello.TELLO_IP,
+        help=f"Specify the address of the drone or the simulator (default: {Tello.TELLO_IP})",
+    )
+    args.add_argument(
+        "--video",
+        action="store_true",
+        help="Show the video stream while flying (ESC closes it)",
+    )
     args.add_argument(
         "--log-level",
         default="INFO",
@@ -95,4 +153,12 @@ if __name__ == "__main__":
         help="Specify the log level (default: INFO)",
     )
     parsed_args = args.parse_args()
-    main(parsed_args.controller, parsed_args.cadence, parsed_args.log_level)
+    main(
+        parsed_args.controller,
+        parsed_args.cadence,
+        parsed_args.log_level,
+        parsed_args.rc_rate,
+        parsed_args.max_state_age,
+        parsed_args.host,
+        parsed_args.video,
+    )
@@ -0,0 +1,142 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+
+try:
+    from face_identifier import AbstractFaceIdentifier, BatchResult, BatchStats
+except ModuleNotFoundError:
+    from face_tracking.face_identifier import (
+        AbstractFaceIdentifier,
+        BatchResult,
+        BatchStats,
+    )
+
+LOGGER = logging.getLogger(__name__)
+
+_worker_identifier: Optional[AbstractFaceIdentifier] = None
+"The identifier of a pool worker process, created once by _init_worker."
+
+
+def _init_worker(factory: Callable[[], AbstractFaceIdentifier]) -> None:
+    global _worker_identifier
+    # Every worker is one of many processes, OpenCV should not start a thread pool in each
+    cv2.setNumThreads(1)
+    _worker_identifier = factory()
+
+
+def _identify_chunk(
+    images: Sequence[cv2.typing.MatLike],
+) -> List[List[Tuple[int, int, int, int]]]:
+    assert _worker_identifier is not None
+    return [
+        [tuple(int(v) for v in box) for box in _worker_identifier.identify_faces(image)]  # type: ignore
+        for image in images
+    ]
+
+
+class FaceDetectionPool:
+    """
+    A pool of worker processes that detect faces, kept open across batches.
+
+    Every worker builds its own identifier with the factory once, when it starts, so
+    models are loaded once per worker and not per frame or per batch. Reuse one pool
+    for repeated offline runs and close it when done. The frames are sent in chunks to
+    keep the pickling overhead per frame low. The results come back in the order of
+    the frames.
+
+    Args:
+        factory: A picklable callable that creates the identifier, like a functools.partial of its class.
+        workers: The number of processes. Defaults to the CPU count.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], AbstractFaceIdentifier],
+        workers: Optional[int] = None,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(factory,)
+        )
+
+    def identify_faces_batch(
+        self, images: Sequence[cv2.typing.MatLike], chunk_size: int = 8
+    ) -> BatchResult:
+        """
+        Detects faces in many frames.
+
+        Args:
+            images: The frames to search.
+            chunk_size: The number of frames sent to a worker at a time.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"The chunk size must be at least 1. Got {chunk_size}")
+        chunks = []
+        for first in range(0, len(images), chunk_size):
+            last = first + chunk_size
+            chunks.append(images[first:last])
+        workers = max(1, min(self.workers, len(chunks)))
+
+        start = time.perf_counter()
+        faces: List[List[Tuple[int, int, int, int]]] = []
+        for chunk_faces in self._executor.map(_identify_chunk, chunks):
+            faces.extend(chunk_faces)
+        stats = BatchStats(len(images), time.perf_counter() - start, workers)
+        LOGGER.debug(
+            f"Detected faces in {stats.frames} frames at {stats.fps:.1f} fps with {workers} workers"
+        )
+        return BatchResult(faces, stats)  # type: ignore
+
+    def close(self) -> None:
+        "Stops the worker processes."
+        self._executor.shutdown()
+
+    def __enter__(self) -> "FaceDetectionPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def reuse_pool(
+    pool: Optional[FaceDetectionPool],
+    factory: Callable[[], AbstractFaceIdentifier],
+    workers: Optional[int] = None,
+) -> FaceDetectionPool:
+    "Returns the pool, or a new one if there is none or it has a different number of workers than asked for."
+    if pool is not None and (workers is None or pool.workers == workers):
+        return pool
+    if pool is not None:
+        pool.close()
+    return FaceDetectionPool(factory, workers)
+
+
+def identify_faces_in_pool(
+    factory: Callable[[], AbstractFaceIdentifier],
+    images: Sequence[cv2.typing.MatLike],
+    workers: Optional[int] = None,
+    chunk_size: int = 8,
+    pool: Optional[FaceDetectionPool] = None,
+) -> BatchResult:
+    """
+    Detects faces in many frames with a pool of worker processes.
+
+    Pass a FaceDetectionPool to reuse its workers and their loaded models. Without one
+    a pool is started for this call and closed afterwards, which loads the models again
+    in every worker.
+
+    Args:
+        factory: A picklable callable that creates the identifier. Ignored when a pool is given.
+        images: The frames to search.
+        workers: The number of processes. Defaults to the CPU count. Ignored when a pool is given.
+        chunk_size: The number of frames sent to a worker at a time.
+        pool: The pool to run in.
+    """
+    if pool is not None:
+        return pool.identify_faces_batch(images, chunk_size)
+    with FaceDetectionPool(factory, workers) as new_pool:
+        return new_pool.identify_faces_batch(images, chunk_size)
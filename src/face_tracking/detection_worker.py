@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from typing import Any, NamedTuple, Optional, Protocol, Sequence
+
+import cv2
+import numpy as np
+
+try:
+    from face_identifier import AbstractFaceIdentifier
+except ModuleNotFoundError:
+    from face_tracking.face_identifier import AbstractFaceIdentifier
+
+LOGGER = logging.getLogger(__name__)
+
+
+class FrameSource(Protocol):
+    """
+    Anything that hands out numbered frames, like the services' SequencedFrameReader or VideoReceiver.
+
+    wait_for_next_frame returns an object with seq, timestamp (time.monotonic) and
+    frame attributes, or None on timeout.
+    """
+
+    def wait_for_next_frame(
+        self, after_seq: int = 0, timeout: Optional[float] = None
+    ) -> Any:
+        ...
+
+
+class Detection(NamedTuple):
+    frame_seq: int
+    "The sequence number of the frame the faces were found in."
+    frame_timestamp: float
+    "The time.monotonic() at which the frame was captured."
+    detected_at: float
+    "The time.monotonic() at which detection finished."
+    faces: Sequence[cv2.typing.Rect]
+    frame: np.ndarray
+
+    @property
+    def age_secs(self) -> float:
+        "How old the frame behind this detection is now."
+        return time.monotonic() - self.frame_timestamp
+
+
+class DetectionWorker:
+    """
+    Runs a face identifier on a background thread, always on the newest frame.
+
+    Whenever the worker is free it takes the newest frame of the source. Frames that
+    arrived while it was busy are skipped, and a frame older than max_frame_age_secs is
+    dropped without running the detector on it. Every result is published as a
+    Detection with the frame's capture time, so the control loop can run at its own
+    fixed rate on the latest detection and judge how old it is.
+    """
+
+    def __init__(
+        self,
+        identifier: AbstractFaceIdentifier,
+        frame_source: FrameSource,
+        max_frame_age_secs: Optional[float] = None,
+    ):
+        self.identifier = identifier
+        self.frame_source = frame_source
+        self.max_frame_age_secs = max_frame_age_secs
+
+        self._condition = threading.Condition()
+        self._latest: Optional[Detection] = None
+        self._detections = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.frames_skipped = 0
+        "Frames that arrived while the detector was busy with an older one."
+        self.frames_stale = 0
+        "Frames dropped because they were too old by the time the detector was free."
+        self.errors = 0
+        self.detection_secs = 0.0
+
+    def start(self) -> "DetectionWorker":
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="DetectionWorker", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+
+    def _run(self) -> None:
+        seq = 0
+        while not self._stop.is_set():
+            sequenced_frame = self.frame_source.wait_for_next_frame(seq, timeout=0.5)
+            if sequenced_frame is None:
+                continue
+            if seq and sequenced_frame.seq > seq + 1:
+                self.frames_skipped += sequenced_frame.seq - seq - 1
+            seq = sequenced_frame.seq
+
+            age = time.monotonic() - sequenced_frame.timestamp
+            if self.max_frame_age_secs is not None and age > self.max_frame_age_secs:
+                self.frames_stale += 1
+                LOGGER.debug(f"Dropping frame {seq}, it is {age * 1000:.0f}ms old")
+                continue
+
+            start = time.monotonic()
+            try:
+                faces = self.identifier.identify_faces(sequenced_frame.frame)
+            except Exception as e:
+                self.errors += 1
+                LOGGER.error(f"Error detecting faces: {e}")
+                continue
+            detected_at = time.monotonic()
+            self.detection_secs += detected_at - start
+
+            detection = Detection(
+                seq,
+                sequenced_frame.timestamp,
+                detected_at,
+                faces,
+                sequenced_frame.frame,
+            )
+            with self._condition:
+                self._latest = detection
+                self._detections += 1
+                self._condition.notify_all()
+
+    def latest(self) -> Optional[Detection]:
+        "The newest detection, or None before the first one."
+        with self._condition:
+            return self._latest
+
+    def wait_for_next(
+        self, after_frame_seq: int = 0, timeout: Optional[float] = None
+    ) -> Optional[Detection]:
+        "Blocks until a detection on a frame newer than after_frame_seq is published, None on timeout."
+
+        def ready() -> bool:
+            return self._has_detection_after(after_frame_seq) or self._stop.is_set()
+
+        with self._condition:
+            self._condition.wait_for(ready, timeout)
+            latest = self._latest
+        if latest is None or latest.frame_seq <= after_frame_seq:
+            return None
+        return latest
+
+    def _has_detection_after(self, frame_seq: int) -> bool:
+        return self._latest is not None and self._latest.frame_seq > frame_seq
+
+    def get_stats(self) -> dict:
+        secs = self.detection_secs
+        return {
+            "detections": self._detections,
+            "frames_skipped": self.frames_skipped,
+            "frames_stale": self.frames_stale,
+            "errors": self.errors,
+            "detection_fps": self._detections / secs if secs else 0.0,
+        }
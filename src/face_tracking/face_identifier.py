@@ -1,6 +1,36 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Sequence
+from dataclasses import dataclass
+from typing import List, NamedTuple, Sequence, Tuple
 import cv2
+import numpy as np
+
+
+@dataclass
+class BatchStats:
+    "Throughput of one identify_faces_batch call"
+
+    frames: int
+    secs: float
+    workers: int = 1
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.secs if self.secs > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "frames": self.frames,
+            "secs": self.secs,
+            "workers": self.workers,
+            "fps": self.fps,
+        }
+
+
+class BatchResult(NamedTuple):
+    faces: List[Sequence[cv2.typing.Rect]]
+    "The faces of every image, in the order of the images."
+    stats: BatchStats
 
 
 class AbstractFaceIdentifier(ABC):
@@ -23,3 +53,32 @@ class AbstractFaceIdentifier(ABC):
                 A list of tuples containing the face bounding box coordinates
                 (top, right, bottom, left) for each detected face.
         """
+
+    def identify_faces_batch(self, images: Sequence[cv2.typing.MatLike]) -> BatchResult:
+        """
+        Detect faces in many frames, for example a whole recording.
+
+        The default runs identify_faces on one frame after the other. Identifiers
+        override it with faster batch implementations.
+
+        Args:
+            images: The frames to search.
+
+        Returns:
+            BatchResult: The faces of every frame in order, and the throughput.
+        """
+        start = time.perf_counter()
+        faces = [self.identify_faces(image) for image in images]
+        return BatchResult(faces, BatchStats(len(images), time.perf_counter() - start))
+
+    def warm_up(self, image_shape: Tuple[int, ...] = (720, 960, 3)) -> float:
+        """
+        Runs the detector once on a blank frame, so loading models and the slow first
+        inference happen before the flight loop starts.
+
+        Returns:
+            float: The seconds the warm up took.
+        """
+        start = time.perf_counter()
+        self.identify_faces(np.zeros(image_shape, dtype=np.uint8))
+        return time.perf_counter() - start
@@ -0,0 +1,86 @@
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import cv2
+
+LOGGER = logging.getLogger(__name__)
+
+HAAR_FRONTAL_FACE = "haar_frontalface"
+FACE_RECOGNITION = "face_recognition"
+
+_HAAR_FRONTAL_FACE_FILE = "haarcascade_frontalface_default.xml"
+
+
+class ModelRegistry:
+    """
+    Loads every detector model lazily, at most once per process, and shares it.
+
+    Models are registered by name with a loader and only loaded on the first get.
+    Identifiers that use the same model share one instance. Loading is thread safe:
+    concurrent first calls wait for one load instead of loading twice.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.load_secs: Dict[str, float] = {}
+        "How long each loaded model took to load."
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        "Registers or replaces the loader of a model. A loaded model is dropped."
+        with self._lock:
+            self._loaders[name] = loader
+            self._models.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        "Returns the model, loading it on first use."
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                try:
+                    loader = self._loaders[name]
+                except KeyError:
+                    raise KeyError(f"No model registered as '{name}'")
+                start = time.perf_counter()
+                model = loader()
+                self.load_secs[name] = time.perf_counter() - start
+                self._models[name] = model
+                LOGGER.debug(f"Loaded model '{name}' in {self.load_secs[name]:.3f}s")
+            return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        "Loads the given models, or all registered ones, ahead of their first use."
+        for name in list(self._loaders) if names is None else names:
+            self.get(name)
+
+
+def _load_haar_frontal_face() -> cv2.CascadeClassifier:
+    # A copy in the working directory takes precedence, as it always did
+    path = _HAAR_FRONTAL_FACE_FILE
+    if not os.path.isfile(path):
+        path = os.path.join(cv2.data.haarcascades, _HAAR_FRONTAL_FACE_FILE)  # type: ignore
+    classifier = cv2.CascadeClassifier(path)
+    if classifier.empty():
+        raise FileNotFoundError(f"Could not load the face cascade from {path}")
+    return classifier
+
+
+MODEL_REGISTRY = ModelRegistry()
+"The registry shared by everything in the process."
+
+MODEL_REGISTRY.register(HAAR_FRONTAL_FACE, _load_haar_frontal_face)
+# Importing face_recognition loads the dlib models, so it is only imported when needed
+MODEL_REGISTRY.register(
+    FACE_RECOGNITION, lambda: importlib.import_module("face_recognition")
+)
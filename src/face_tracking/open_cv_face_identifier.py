@@ -1,21 +1,48 @@
-from typing import Sequence
+from functools import partial
+from typing import Optional, Sequence
 
 import cv2
 
 try:
     from open_cv_wrapper import OpenCvWrapper
-    from face_identifier import AbstractFaceIdentifier
+    from face_identifier import AbstractFaceIdentifier, BatchResult
+    from batch_detection import FaceDetectionPool, reuse_pool
 except ModuleNotFoundError:
     from face_tracking.open_cv_wrapper import OpenCvWrapper
-    from face_tracking.face_identifier import AbstractFaceIdentifier
+    from face_tracking.face_identifier import AbstractFaceIdentifier, BatchResult
+    from face_tracking.batch_detection import FaceDetectionPool, reuse_pool
 
 
 class OpenCvFaceIdentifier(AbstractFaceIdentifier):
     def __init__(self, open_cv: OpenCvWrapper):
         self._face_cascade = open_cv.get_face_classifier()
         self.open_cv = open_cv
+        self._pool: Optional[FaceDetectionPool] = None
 
     def identify_faces(self, image: cv2.typing.MatLike) -> Sequence[cv2.typing.Rect]:
         gray = self.open_cv.convert_rgb_image_to_gray(image)
         faces = self._face_cascade.detectMultiScale(gray, 1.3, 5)
-        return faces
+        # OpenCV returns (x, y, width, height), the identifiers return (top, right, bottom, left)
+        return [(int(y), int(x + w), int(y + h), int(x)) for x, y, w, h in faces]
+
+    def identify_faces_batch(
+        self,
+        images: Sequence[cv2.typing.MatLike],
+        workers: Optional[int] = None,
+        chunk_size: int = 8,
+    ) -> BatchResult:
+        """
+        Runs the Haar cascade over the frames in a process pool, see FaceDetectionPool.
+
+        The pool is kept for the next call, so the workers load the cascade only once.
+        """
+        self._pool = reuse_pool(
+            self._pool, partial(OpenCvFaceIdentifier, self.open_cv), workers
+        )
+        return self._pool.identify_faces_batch(images, chunk_size)
+
+    def close(self) -> None:
+        "Stops the worker processes of identify_faces_batch."
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
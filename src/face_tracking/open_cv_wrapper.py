@@ -2,6 +2,11 @@ import logging
 from typing import Any
 import cv2
 
+try:
+    from model_registry import HAAR_FRONTAL_FACE, MODEL_REGISTRY
+except ModuleNotFoundError:
+    from face_tracking.model_registry import HAAR_FRONTAL_FACE, MODEL_REGISTRY
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -24,7 +29,8 @@ class OpenCvWrapper:
         return cv2.resize(*args, **kwargs)
 
     def get_face_classifier(self) -> cv2.CascadeClassifier:
-        return cv2.CascadeClassifier("haarcascade_frontalface_default.xml")
+        "The process wide frontal face cascade, loaded on first use."
+        return MODEL_REGISTRY.get(HAAR_FRONTAL_FACE)
 
     def convert_rgb_image_to_gray(
         self, image: cv2.typing.MatLike
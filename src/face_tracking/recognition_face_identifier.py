@@ -1,17 +1,26 @@
-from typing import Literal, Sequence
-import face_recognition  # type ignore
+import time
+from functools import partial
+from typing import List, Literal, Optional, Sequence, Tuple
 
 import cv2
 
 try:
+    from model_registry import FACE_RECOGNITION, MODEL_REGISTRY
     from open_cv_wrapper import OpenCvWrapper
-    from face_identifier import AbstractFaceIdentifier
+    from face_identifier import AbstractFaceIdentifier, BatchResult, BatchStats
     from image_compression_service import ImageCompressionService
+    from batch_detection import FaceDetectionPool, reuse_pool
 
 except ModuleNotFoundError:
+    from face_tracking.model_registry import FACE_RECOGNITION, MODEL_REGISTRY
     from face_tracking.open_cv_wrapper import OpenCvWrapper
-    from face_tracking.face_identifier import AbstractFaceIdentifier
+    from face_tracking.face_identifier import (
+        AbstractFaceIdentifier,
+        BatchResult,
+        BatchStats,
+    )
     from face_tracking.image_compression_service import ImageCompressionService
+    from face_tracking.batch_detection import FaceDetectionPool, reuse_pool
 
 
 class RecognitionFaceIdentifier(AbstractFaceIdentifier):
@@ -21,12 +30,14 @@ class RecognitionFaceIdentifier(AbstractFaceIdentifier):
         image_compression_service: ImageCompressionService,
         model: Literal["hog", "cnn"] = "hog",
         compression_factor: int = 4,
+        number_of_times_to_upsample: int = 1,
     ):
-        self._face_cascade = open_cv.get_face_classifier()
         self.open_cv = open_cv
         self.model = model
+        self.number_of_times_to_upsample = number_of_times_to_upsample
         self.image_compression = image_compression_service
         self.image_compression_factor = compression_factor
+        self._pool: Optional[FaceDetectionPool] = None
 
     def identify_faces(self, frame: cv2.typing.MatLike) -> Sequence[cv2.typing.Rect]:
 
@@ -34,9 +45,19 @@ class RecognitionFaceIdentifier(AbstractFaceIdentifier):
         compressed_image = self.image_compression.compress_image(
             frame, compression_factor
         )
+        # face_recognition loads its models when imported, so it is imported on first use
+        face_recognition = MODEL_REGISTRY.get(FACE_RECOGNITION)
         face_locations = face_recognition.face_locations(
-            compressed_image, model=self.model
+            compressed_image,
+            number_of_times_to_upsample=self.number_of_times_to_upsample,
+            model=self.model,
         )
+        return self._to_original_scale(face_locations)
+
+    def _to_original_scale(
+        self, face_locations: Sequence[Tuple[int, int, int, int]]
+    ) -> List[Tuple[int, int, int, int]]:
+        compression_factor = self.image_compression_factor
         original_face_locations = []
         for top, right, bottom, left in face_locations:
             original_top = top * compression_factor
@@ -48,3 +69,72 @@ class RecognitionFaceIdentifier(AbstractFaceIdentifier):
             )
 
         return original_face_locations
+
+    def identify_faces_batch(
+        self,
+        images: Sequence[cv2.typing.MatLike],
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> BatchResult:
+        """
+        Detect faces in many frames.
+
+        The hog model runs in a process pool, see FaceDetectionPool. The pool is kept
+        for the next call, so the workers load the models only once.
+
+        The cnn model runs the frames through the network in batches with
+        face_recognition.batch_face_locations, which needs frames of one size.
+
+        Args:
+            workers: hog only. The number of worker processes.
+            chunk_size: hog only. The frames handed to a worker at once. Defaults to 8.
+            batch_size: cnn only. The frames per network pass. Defaults to 32.
+
+        Raises:
+            ValueError: If an argument of the other model is given, or the cnn model
+                gets frames of different sizes.
+        """
+        if self.model != "cnn":
+            if batch_size is not None:
+                raise ValueError("batch_size only applies to the cnn model")
+            factory = partial(
+                RecognitionFaceIdentifier,
+                self.open_cv,
+                self.image_compression,
+                self.model,
+                self.image_compression_factor,
+                self.number_of_times_to_upsample,
+            )
+            self._pool = reuse_pool(self._pool, factory, workers)
+            return self._pool.identify_faces_batch(
+                images, 8 if chunk_size is None else chunk_size
+            )
+
+        if workers is not None or chunk_size is not None:
+            raise ValueError("workers and chunk_size only apply to the hog model")
+        shapes = {image.shape[:2] for image in images}
+        if len(shapes) > 1:
+            raise ValueError(
+                f"The cnn model needs frames of one size. Got {sorted(shapes)}"
+            )
+
+        start = time.perf_counter()
+        compressed_images = [
+            self.image_compression.compress_image(image, self.image_compression_factor)
+            for image in images
+        ]
+        face_recognition = MODEL_REGISTRY.get(FACE_RECOGNITION)
+        batches = face_recognition.batch_face_locations(
+            compressed_images,
+            number_of_times_to_upsample=self.number_of_times_to_upsample,
+            batch_size=32 if batch_size is None else batch_size,
+        )
+        faces = [self._to_original_scale(face_locations) for face_locations in batches]
+        return BatchResult(faces, BatchStats(len(images), time.perf_counter() - start))  # type: ignore
+
+    def close(self) -> None:
+        "Stops the worker processes of identify_faces_batch."
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
@@ -0,0 +1,124 @@
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+
+try:
+    from face_identifier import AbstractFaceIdentifier
+except ModuleNotFoundError:
+    from face_tracking.face_identifier import AbstractFaceIdentifier
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RoiFaceIdentifier(AbstractFaceIdentifier):
+    """
+    Searches for the face in a padded window around where it was last seen.
+
+    The target moves only a few pixels from one frame to the next, so the wrapped
+    identifier is run on a crop around the previous box, which is much smaller than
+    the frame. The boxes are mapped back into frame coordinates. Only when no face is
+    found in the window, or nothing was seen yet, is the full frame scanned.
+
+    After every frame the box closest to the previous one becomes the new target.
+    """
+
+    def __init__(
+        self,
+        detector: AbstractFaceIdentifier,
+        padding: float = 1.0,
+        min_roi_size: int = 96,
+    ):
+        """
+        Args:
+            detector: The identifier to run on the window or the full frame.
+            padding: How far the window extends beyond the box on each side, as a multiple of the box size.
+            min_roi_size: The smallest width and height of the window in pixels.
+        """
+        self.detector = detector
+        self.padding = padding
+        self.min_roi_size = min_roi_size
+        self._last_box: Optional[Tuple[int, int, int, int]] = None
+
+        self.roi_hits = 0
+        "Frames where the face was found inside the window."
+        self.full_scans = 0
+        "Frames where the full frame had to be scanned."
+
+    def get_roi(
+        self, box: Tuple[int, int, int, int], frame_height: int, frame_width: int
+    ) -> Tuple[int, int, int, int]:
+        "The padded window around a box as (top, right, bottom, left), clipped to the frame."
+        top, right, bottom, left = box
+        box_width, box_height = right - left, bottom - top
+        pad_x = max(
+            int(box_width * self.padding), (self.min_roi_size - box_width) // 2, 0
+        )
+        pad_y = max(
+            int(box_height * self.padding), (self.min_roi_size - box_height) // 2, 0
+        )
+        return (
+            max(0, top - pad_y),
+            min(frame_width, right + pad_x),
+            min(frame_height, bottom + pad_y),
+            max(0, left - pad_x),
+        )
+
+    def identify_faces(self, image: cv2.typing.MatLike) -> Sequence[cv2.typing.Rect]:
+        boxes: List[Tuple[int, int, int, int]] = []
+        if self._last_box is not None:
+            height, width = image.shape[:2]
+            roi_top, roi_right, roi_bottom, roi_left = self.get_roi(
+                self._last_box, height, width
+            )
+            window = image[roi_top:roi_bottom, roi_left:roi_right]
+            boxes = [
+                (top + roi_top, right + roi_left, bottom + roi_top, left + roi_left)
+                for top, right, bottom, left in self.detector.identify_faces(window)
+            ]
+            if boxes:
+                self.roi_hits += 1
+            else:
+                LOGGER.debug("Face lost in the search window, scanning the full frame")
+
+        if not boxes:
+            self.full_scans += 1
+            boxes = [tuple(box) for box in self.detector.identify_faces(image)]  # type: ignore
+
+        self._last_box = self._closest_to_last(boxes)
+        return boxes
+
+    def _closest_to_last(
+        self, boxes: List[Tuple[int, int, int, int]]
+    ) -> Optional[Tuple[int, int, int, int]]:
+        if not boxes:
+            return None
+        if self._last_box is None:
+            return boxes[0]
+        last_top, last_right, last_bottom, last_left = self._last_box
+        last_x, last_y = (last_left + last_right) / 2, (last_top + last_bottom) / 2
+
+        def squared_distance(box: Tuple[int, int, int, int]) -> float:
+            top, right, bottom, left = box
+            dx = (left + right) / 2 - last_x
+            dy = (top + bottom) / 2 - last_y
+            return dx**2 + dy**2
+
+        return min(boxes, key=squared_distance)
+
+    def warm_up(self, image_shape: Tuple[int, ...] = (720, 960, 3)) -> float:
+        "Warms up the wrapped identifier without touching the target."
+        return self.detector.warm_up(image_shape)
+
+    def reset(self) -> None:
+        "Forgets the target, so the next frame is scanned in full."
+        self._last_box = None
+
+    def get_stats(self) -> dict:
+        frames = self.roi_hits + self.full_scans
+        return {
+            "frames": frames,
+            "roi_hits": self.roi_hits,
+            "full_scans": self.full_scans,
+            "roi_hit_ratio": self.roi_hits / frames if frames else 0.0,
+        }
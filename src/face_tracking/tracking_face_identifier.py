@@ -0,0 +1,200 @@
+import logging
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from open_cv_wrapper import OpenCvWrapper
+    from face_identifier import AbstractFaceIdentifier
+except ModuleNotFoundError:
+    from face_tracking.open_cv_wrapper import OpenCvWrapper
+    from face_tracking.face_identifier import AbstractFaceIdentifier
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _Track:
+    "A face box and the feature points inside it that are followed from frame to frame."
+
+    def __init__(self, box: Tuple[int, int, int, int], points: np.ndarray):
+        self.box = box
+        self.points = points
+        self.initial_points = len(points)
+
+
+class TrackingFaceIdentifier(AbstractFaceIdentifier):
+    """
+    Runs a full face detector only now and then and tracks the faces in between.
+
+    The detector runs on every detect_every-th frame, and sooner when the tracking
+    confidence drops below min_confidence. On the other frames the boxes are
+    propagated with pyramidal Lucas-Kanade optical flow on a few corner features inside
+    each box. That costs a fraction of a HOG or CNN pass. The box moves with the median
+    motion of its features and scales with their spread.
+
+    The confidence of a track is the share of its features that are still followed.
+
+    get_stats reports the effective frames per second and the detector duty cycle.
+    """
+
+    def __init__(
+        self,
+        detector: AbstractFaceIdentifier,
+        open_cv: OpenCvWrapper,
+        detect_every: int = 10,
+        min_confidence: float = 0.5,
+        max_features: int = 40,
+    ):
+        """
+        Args:
+            detector: The identifier that finds faces on a full frame.
+            detect_every: Run the detector at least on every n-th frame.
+            min_confidence: Detect again when a track keeps fewer of its features than this.
+            max_features: The number of corner features tracked per face.
+        """
+        if detect_every < 1:
+            raise ValueError(f"detect_every must be at least 1. Got {detect_every}")
+        self.detector = detector
+        self.open_cv = open_cv
+        self.detect_every = detect_every
+        self.min_confidence = min_confidence
+        self.max_features = max_features
+
+        self._previous_gray: Optional[np.ndarray] = None
+        self._tracks: List[_Track] = []
+        self._frames_since_detection = 0
+
+        self.frames = 0
+        self.detections = 0
+        self.detection_secs = 0.0
+        self.tracking_secs = 0.0
+        self.confidence = 0.0
+        "The lowest track confidence of the last frame."
+
+    def identify_faces(self, image: cv2.typing.MatLike) -> Sequence[cv2.typing.Rect]:
+        start = time.perf_counter()
+        gray = self.open_cv.convert_rgb_image_to_gray(image)
+        self.frames += 1
+
+        boxes = None
+        if self._tracks and self._frames_since_detection < self.detect_every:
+            boxes = self._track(gray)
+            if boxes is None:
+                LOGGER.debug(
+                    f"Tracking confidence {self.confidence:.2f}, detecting again"
+                )
+        if boxes is not None:
+            self._frames_since_detection += 1
+            self.tracking_secs += time.perf_counter() - start
+        else:
+            boxes = self._detect(image, gray)
+            self.detection_secs += time.perf_counter() - start
+
+        self._previous_gray = gray
+        return boxes
+
+    def _detect(
+        self, image: cv2.typing.MatLike, gray: np.ndarray
+    ) -> List[Tuple[int, int, int, int]]:
+        boxes = [
+            tuple(int(v) for v in box) for box in self.detector.identify_faces(image)
+        ]
+        self.detections += 1
+        self._frames_since_detection = 1
+        self._tracks = []
+        for box in boxes:
+            points = self._find_features(gray, box)
+            if points is not None:
+                self._tracks.append(_Track(box, points))  # type: ignore
+        self.confidence = 1.0
+        return boxes  # type: ignore
+
+    def _find_features(
+        self, gray: np.ndarray, box: Tuple[int, int, int, int]
+    ) -> Optional[np.ndarray]:
+        top, right, bottom, left = box
+        height, width = gray.shape[:2]
+        top, bottom = max(0, top), min(height, bottom)
+        left, right = max(0, left), min(width, right)
+        if bottom - top < 8 or right - left < 8:
+            return None
+        points = cv2.goodFeaturesToTrack(
+            gray[top:bottom, left:right],
+            maxCorners=self.max_features,
+            qualityLevel=0.01,
+            minDistance=3,
+        )
+        if points is None or len(points) < 4:
+            return None
+        return (points + np.array([left, top], dtype=np.float32)).astype(np.float32)
+
+    def _track(self, gray: np.ndarray) -> Optional[List[Tuple[int, int, int, int]]]:
+        "Moves every box with its features. Returns None when a track became unreliable."
+        assert self._previous_gray is not None
+        all_points = np.concatenate([track.points for track in self._tracks])
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(
+            self._previous_gray, gray, all_points, None, winSize=(15, 15), maxLevel=2
+        )
+        status = status.reshape(-1).astype(bool)
+
+        boxes = []
+        confidence = 1.0
+        offset = 0
+        for track in self._tracks:
+            end = offset + len(track.points)
+            found = status[offset:end]
+            old = track.points[found].reshape(-1, 2)
+            new = moved[offset:end][found].reshape(-1, 2)
+            offset = end
+
+            confidence = min(confidence, len(new) / track.initial_points)
+            if len(new) < 4:
+                self.confidence = 0.0
+                return None
+
+            dx, dy = np.median(new - old, axis=0)
+            old_spread = np.median(np.linalg.norm(old - old.mean(axis=0), axis=1))
+            new_spread = np.median(np.linalg.norm(new - new.mean(axis=0), axis=1))
+            scale = new_spread / old_spread if old_spread > 0 else 1.0
+
+            top, right, bottom, left = track.box
+            center_x = (left + right) / 2 + dx
+            center_y = (top + bottom) / 2 + dy
+            half_width = (right - left) / 2 * scale
+            half_height = (bottom - top) / 2 * scale
+            track.box = (
+                int(round(center_y - half_height)),
+                int(round(center_x + half_width)),
+                int(round(center_y + half_height)),
+                int(round(center_x - half_width)),
+            )
+            track.points = new.reshape(-1, 1, 2)
+            boxes.append(track.box)
+
+        self.confidence = confidence
+        if confidence < self.min_confidence:
+            return None
+        return boxes
+
+    def warm_up(self, image_shape: Tuple[int, ...] = (720, 960, 3)) -> float:
+        "Warms up the detector without touching the tracks or the stats."
+        return self.detector.warm_up(image_shape)
+
+    def reset(self) -> None:
+        "Forgets the tracked faces, so the next frame runs the detector."
+        self._tracks = []
+        self._previous_gray = None
+
+    def get_stats(self) -> dict:
+        total_secs = self.detection_secs + self.tracking_secs
+        duty_cycle = self.detection_secs / total_secs if total_secs else 0.0
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "detection_ratio": self.detections / self.frames if self.frames else 0.0,
+            "detector_duty_cycle": duty_cycle,
+            "effective_fps": self.frames / total_secs if total_secs else 0.0,
+            "confidence": self.confidence,
+        }
@@ -30,7 +30,6 @@ class FaceFollowingController:
         z = normalized_z if abs(normalized_z) > dead_zone else 0
 
         return TelloControlState(
-            events=[],
             forward_velocity=z,
             right_velocity=0,  # Set right_velocity to 0
             up_velocity=-y,
@@ -10,6 +10,7 @@ from typing import Callable, Dict, List
 from joysticks.pygame_connector import PyGameConnector
 import pygame
 from services.tello_controller import (
+    NO_EVENTS,
     TelloActionType,
     TelloControlState,
     TelloController,
@@ -94,12 +95,13 @@ class KeyboardControlAdapter(TelloController):
                     self.axis_key_map[event.key](state)
 
         state = self.state
-        return TelloControlState(
+        # The velocities are clamped by update_velocity, so validation can be skipped
+        return TelloControlState.trusted(
             forward_velocity=state.forward_velocity,
             right_velocity=state.right_velocity,
             up_velocity=state.up_velocity,
             yaw_right_velocity=state.yaw_right_velocity,
-            events=events,
+            events=events or NO_EVENTS,
         )
 
     def increase_left_yaw(self, state):
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Tuple
+
+from services.priority_command_queue import CommandPriority, PriorityCommandQueue
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ActionExecutor:
+    """
+    Runs blocking discrete actions (takeoff, land, flips, speed changes) on a
+    background worker so they never stall the RC stream.
+
+    Every submitted action gets a Future that acts as its acknowledgement. If the
+    action has not finished within its timeout the Future fails with a TimeoutError.
+    The action itself cannot be interrupted, so the worker only moves on once the
+    drone has answered or the underlying library gave up.
+
+    Actions are served from a PriorityCommandQueue, so a SAFETY action such as a
+    landing overtakes queued flips. Preempting actions, such as an emergency stop,
+    skip the queue entirely. They run on the caller's thread immediately and cancel
+    everything that is still queued.
+    """
+
+    default_timeout_secs = 30.0
+    "The time an action may take before its acknowledgement fails."
+
+    def __init__(
+        self, default_timeout_secs: Optional[float] = None, max_pending: int = 16
+    ):
+        if default_timeout_secs is not None:
+            self.default_timeout_secs = default_timeout_secs
+        self._queue: PriorityCommandQueue[
+            Tuple[str, Callable[[], Any], float, Future]
+        ] = PriorityCommandQueue(action_depth=max_pending)
+        self._stopping = threading.Event()
+        self._resolve_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ActionExecutor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        "Cancels the pending actions and stops the worker once the current action is done."
+        self._stopping.set()
+        self._cancel_pending()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(
+        self,
+        name: str,
+        action: Callable[[], Any],
+        timeout_secs: Optional[float] = None,
+        priority: CommandPriority = CommandPriority.ACTION,
+    ) -> Future:
+        """
+        Queues an action for the worker.
+
+        Returns:
+            Future: Resolves with the action's result once the drone acknowledged it.
+                It fails with a RuntimeError if the queue is full.
+        """
+        future: Future = Future()
+        timeout = self.default_timeout_secs if timeout_secs is None else timeout_secs
+        if self._queue.put((name, action, timeout, future), priority):
+            LOGGER.debug(f"Queued action {name} with priority {priority.name}")
+        else:
+            LOGGER.warning(f"Action queue full, rejected {name}")
+            future.set_exception(RuntimeError(f"Action queue full, rejected {name}"))
+        return future
+
+    def preempt(self, name: str, action: Callable[[], Any]) -> Any:
+        """
+        Cancels all queued actions and runs the given action right now on the caller's thread.
+        """
+        cancelled = self._cancel_pending()
+        if cancelled:
+            LOGGER.warning(f"{name} cancelled {cancelled} queued actions")
+        LOGGER.info(f"Running {name} immediately")
+        return action()
+
+    def cancel(self, priority: CommandPriority) -> int:
+        """
+        Cancels the queued actions of one priority class. A running action is not affected.
+
+        Returns:
+            int: The number of actions that were cancelled.
+        """
+        cancelled = self._cancel_pending(priority)
+        if cancelled:
+            LOGGER.info(f"Cancelled {cancelled} queued {priority.name} actions")
+        return cancelled
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> dict:
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "pending": self.pending(),
+            "queue": self._queue.get_stats(),
+        }
+
+    def _cancel_pending(self, priority: Optional[CommandPriority] = None) -> int:
+        cancelled = 0
+        for _, _, _, future in self._queue.clear(priority):
+            if future.cancel():
+                cancelled += 1
+        self.cancelled += cancelled
+        return cancelled
+
+    def _resolve(
+        self,
+        future: Future,
+        result: Any = None,
+        exception: Optional[BaseException] = None,
+    ) -> bool:
+        with self._resolve_lock:
+            if future.done():
+                return False
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+            return True
+
+    def _on_timeout(self, name: str, future: Future, timeout: float) -> None:
+        if self._resolve(
+            future, exception=TimeoutError(f"{name} did not finish in {timeout}s")
+        ):
+            self.timed_out += 1
+            LOGGER.warning(f"Action {name} timed out after {timeout} seconds")
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            item = self._queue.get(timeout=0.1)
+            if item is None:
+                continue
+            _, (name, action, timeout, future) = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            watchdog = threading.Timer(
+                timeout, self._on_timeout, args=(name, future, timeout)
+            )
+            watchdog.daemon = True
+            watchdog.start()
+            start = time.monotonic()
+            try:
+                result = action()
+            except Exception as e:
+                LOGGER.error(f"Action {name} failed: {e}")
+                if self._resolve(future, exception=e):
+                    self.failed += 1
+            else:
+                if self._resolve(future, result):
+                    self.completed += 1
+                LOGGER.debug(f"Action {name} took {time.monotonic() - start:.3f}s")
+            finally:
+                watchdog.cancel()
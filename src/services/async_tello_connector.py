@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import socket
+from typing import Optional, Tuple
+
+from services.tello_connector import clamp_speed_cm_s
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _TelloCommandProtocol(asyncio.DatagramProtocol):
+    """
+    Datagram protocol that hands every response from the drone to the
+    command that is currently waiting for one.
+
+    Datagrams from any other address are dropped. The drone's responses carry no
+    command id, so after a command timed out its late response is caught in
+    late_response instead of being handed to the next command.
+    """
+
+    def __init__(self, remote_address: Tuple[str, int]):
+        self.remote_address = remote_address
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.pending: Optional[asyncio.Future] = None
+        self.late_response: Optional[asyncio.Future] = None
+        "Set while the response to a timed out command is still expected."
+        self.foreign_datagrams = 0
+        "Datagrams that did not come from the drone."
+        self.late_responses = 0
+        "Responses dropped because their command had already timed out."
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        if addr != self.remote_address:
+            self.foreign_datagrams += 1
+            LOGGER.debug(
+                f"Dropping datagram from {addr}, expected {self.remote_address}"
+            )
+            return
+        try:
+            response = data.decode("utf-8").rstrip("\r\n")
+        except UnicodeDecodeError as e:
+            LOGGER.error(f"Could not decode response from {addr}: {e}")
+            return
+
+        if self.late_response is not None and not self.late_response.done():
+            self.late_responses += 1
+            LOGGER.debug(f"Dropping late response to a timed out command: '{response}'")
+            self.late_response.set_result(response)
+            return
+        if self.pending is None or self.pending.done():
+            LOGGER.debug(f"Dropping unsolicited response from {addr}: '{response}'")
+            return
+        self.pending.set_result(response)
+
+    def error_received(self, exc: Exception) -> None:
+        LOGGER.error(f"UDP error: {exc}")
+        if self.pending is not None and not self.pending.done():
+            self.pending.set_exception(exc)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self.pending is not None and not self.pending.done():
+            self.pending.set_exception(
+                exc or ConnectionError("Connection to the Tello was closed")
+            )
+
+
+class AsyncTelloConnector:
+    """
+    An asyncio native counterpart of the TelloConnector.
+
+    Commands are sent over an asyncio datagram endpoint and awaited with a timeout,
+    so a takeoff or a flip only suspends the coroutine that issued it while the
+    rest of the event loop keeps running. RC commands are fire-and-forget.
+
+    The Tello SDK only handles one command at a time, so commands that expect a
+    response are serialised through a lock. After a command timed out the next one
+    waits up to LATE_RESPONSE_WAIT_SECS for the late response, which is dropped.
+    Only datagrams from the drone's address are read as responses.
+
+    Args:
+        host: The IP address of the drone.
+        port: The command port of the drone.
+        local_port: The local port to bind to. 0 picks a free port, which lets
+            the connector run next to a simulator on 127.0.0.1.
+        command_timeout_secs: The default time to wait for a command response.
+    """
+
+    TELLO_IP = "192.168.10.1"
+    CONTROL_UDP_PORT = 8889
+
+    RESPONSE_TIMEOUT_SECS = 7.0
+    TAKEOFF_TIMEOUT_SECS = 20.0
+    TIME_BTW_COMMANDS_SECS = 0.1
+    LATE_RESPONSE_WAIT_SECS = 1.0
+
+    def __init__(
+        self,
+        host: str = TELLO_IP,
+        port: int = CONTROL_UDP_PORT,
+        local_port: int = 0,
+        command_timeout_secs: float = RESPONSE_TIMEOUT_SECS,
+    ):
+        self.address = (host, port)
+        self.local_port = local_port
+        self.command_timeout_secs = command_timeout_secs
+        self.is_flying = False
+        self.stream_on = False
+        self._protocol: Optional[_TelloCommandProtocol] = None
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._command_lock: Optional[asyncio.Lock] = None
+        self._last_response_time = 0.0
+
+    async def open(self) -> None:
+        "Creates the datagram endpoint without entering SDK mode."
+        if self._transport is not None:
+            return
+        loop = asyncio.get_running_loop()
+        # Responses come from the resolved address, so a host name is resolved once
+        host, port = self.address
+        addresses = await loop.getaddrinfo(
+            host, port, family=socket.AF_INET, type=socket.SOCK_DGRAM
+        )
+        remote_address = addresses[0][4]
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: _TelloCommandProtocol(remote_address),
+            local_addr=("0.0.0.0", self.local_port),
+        )
+        self._transport = transport
+        self._protocol = protocol
+        self._command_lock = asyncio.Lock()
+        LOGGER.debug(f"Opened UDP endpoint to {self.address}")
+
+    async def connect(self, timeout_secs: Optional[float] = None) -> None:
+        "Opens the endpoint and puts the drone into SDK mode."
+        await self.open()
+        await self.send_control_command("command", timeout_secs)
+        LOGGER.debug("Connected to Tello")
+
+    async def send_command(
+        self, command: str, timeout_secs: Optional[float] = None
+    ) -> str:
+        """
+        Sends a command and waits for its response.
+
+        Raises:
+            asyncio.TimeoutError: If the drone does not answer in time.
+        """
+        if self._transport is None or self._protocol is None:
+            raise ConnectionError("The connector is not open. Call connect() first")
+        assert self._command_lock is not None
+
+        timeout = self.command_timeout_secs if timeout_secs is None else timeout_secs
+        loop = asyncio.get_running_loop()
+
+        async with self._command_lock:
+            await self._wait_for_late_response()
+            # The drone drops commands that are sent too close together
+            wait = self.TIME_BTW_COMMANDS_SECS - (
+                loop.time() - self._last_response_time
+            )
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            future = loop.create_future()
+            self._protocol.pending = future
+            LOGGER.debug(f"Send command: '{command}'")
+            self._transport.sendto(command.encode("utf-8"), self.address)
+            try:
+                response = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                LOGGER.warning(
+                    f"Command '{command}' got no response after {timeout} seconds"
+                )
+                self._protocol.late_response = loop.create_future()
+                raise
+            finally:
+                self._protocol.pending = None
+                self._last_response_time = loop.time()
+
+        LOGGER.debug(f"Response {command}: '{response}'")
+        return response
+
+    async def _wait_for_late_response(self) -> None:
+        "Gives the response to a timed out command a moment to arrive before the next command is sent."
+        assert self._protocol is not None
+        late_response = self._protocol.late_response
+        if late_response is None:
+            return
+        try:
+            await asyncio.wait_for(late_response, self.LATE_RESPONSE_WAIT_SECS)
+        except asyncio.TimeoutError:
+            LOGGER.debug("No late response to the timed out command")
+        finally:
+            self._protocol.late_response = None
+
+    async def send_control_command(
+        self, command: str, timeout_secs: Optional[float] = None
+    ) -> None:
+        """
+        Sends a command that the drone acknowledges with 'ok'.
+
+        Raises:
+            RuntimeError: If the drone answers with anything other than 'ok'.
+        """
+        response = await self.send_command(command, timeout_secs)
+        if "ok" not in response.lower():
+            raise RuntimeError(f"Command '{command}' failed with response '{response}'")
+
+    def send_command_without_return(self, command: str) -> None:
+        "Sends a command without waiting for a response."
+        if self._transport is None:
+            raise ConnectionError("The connector is not open. Call connect() first")
+        LOGGER.debug(f"Send command (no response expected): '{command}'")
+        self._transport.sendto(command.encode("utf-8"), self.address)
+
+    def send_rc_control(
+        self,
+        left_right_velocity: int,
+        for_back_velocity: int,
+        up_down_velocity: int,
+        yaw_velocity: int,
+    ) -> None:
+        "Sends RC control commands. The drone does not answer these."
+
+        def clamp100(x: int) -> int:
+            return max(-100, min(100, x))
+
+        self.send_command_without_return(
+            f"rc {clamp100(left_right_velocity)} {clamp100(for_back_velocity)} "
+            f"{clamp100(up_down_velocity)} {clamp100(yaw_velocity)}"
+        )
+
+    async def take_off(self) -> None:
+        LOGGER.info("Taking off...")
+        await self.send_control_command("takeoff", self.TAKEOFF_TIMEOUT_SECS)
+        self.is_flying = True
+
+    async def land(self) -> None:
+        LOGGER.info("Landing...")
+        await self.send_control_command("land")
+        self.is_flying = False
+
+    def emergency_stop(self) -> None:
+        "Stops all motors immediately. This does not wait for the command queue."
+        self.send_command_without_return("emergency")
+        self.is_flying = False
+
+    async def set_speed_cm_s(self, cm_s: int) -> int:
+        """Set speed to x cm/s.
+        Arguments:
+            x: 10-100. Values outside the range are clamped.
+
+        Returns:
+            int: The speed the drone is set to.
+        """
+        clamped = clamp_speed_cm_s(cm_s)
+        if clamped != cm_s:
+            LOGGER.warning(f"Speed {cm_s} cm/s is out of range, using {clamped} cm/s")
+        await self.send_control_command(f"speed {clamped}")
+        return clamped
+
+    async def streamon(self) -> None:
+        await self.send_control_command("streamon")
+        self.stream_on = True
+        LOGGER.info("Video stream on")
+
+    async def streamoff(self) -> None:
+        await self.send_control_command("streamoff")
+        self.stream_on = False
+        LOGGER.debug("Video stream off")
+
+    async def flip_forward(self) -> None:
+        await self.send_control_command("flip f")
+
+    async def flip_back(self) -> None:
+        await self.send_control_command("flip b")
+
+    async def flip_left(self) -> None:
+        await self.send_control_command("flip l")
+
+    async def flip_right(self) -> None:
+        await self.send_control_command("flip r")
+
+    async def query_battery(self) -> int:
+        return int(await self.send_command("battery?"))
+
+    async def end(self) -> None:
+        "Lands the drone if needed and closes the endpoint."
+        LOGGER.debug("Ending async Tello service")
+        try:
+            if self.is_flying:
+                await self.land()
+            if self.stream_on:
+                await self.streamoff()
+        except (asyncio.TimeoutError, RuntimeError) as e:
+            LOGGER.error(f"Error while ending the Tello session: {e}")
+        finally:
+            if self._transport is not None:
+                self._transport.close()
+            self._transport = None
+            self._protocol = None
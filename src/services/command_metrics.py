@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from services.latency_histogram import LatencyHistogram
+
+
+def _is_timeout(error: Exception) -> bool:
+    # djitellopy reports timeouts as a TelloException carrying this message
+    return isinstance(error, TimeoutError) or "Did not receive a response" in str(error)
+
+
+class _CommandStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.timeouts = 0
+
+
+class CommandMetrics:
+    """
+    Per command round trip latency histograms plus error and timeout counters.
+
+    Latencies are recorded for commands that succeed. Failed commands only count
+    as an error or as a timeout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _CommandStats] = {}
+
+    def _get(self, command: str) -> _CommandStats:
+        stats = self._stats.get(command)
+        if stats is None:
+            stats = self._stats[command] = _CommandStats()
+        return stats
+
+    def record(self, command: str, latency_secs: float) -> None:
+        with self._lock:
+            self._get(command).latency.record(latency_secs)
+
+    def record_error(self, command: str, error: Exception) -> None:
+        with self._lock:
+            stats = self._get(command)
+            if _is_timeout(error):
+                stats.timeouts += 1
+            else:
+                stats.errors += 1
+
+    @contextmanager
+    def time(self, command: str) -> Iterator[None]:
+        "Times the block and records it under the command, or counts its exception."
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record_error(command, e)
+            raise
+        self.record(command, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, dict]:
+        "The latency summary in seconds and the counters of every command"
+        with self._lock:
+            return {
+                command: {
+                    "latency_secs": stats.latency.to_dict(),
+                    "errors": stats.errors,
+                    "timeouts": stats.timeouts,
+                }
+                for command, stats in self._stats.items()
+            }
+
+    def to_prometheus(self, prefix: str = "tello_command") -> str:
+        "The metrics in the Prometheus text exposition format"
+        lines = [
+            f"# HELP {prefix}_latency_seconds Round trip latency of successful commands.",
+            f"# TYPE {prefix}_latency_seconds summary",
+        ]
+        with self._lock:
+            items = sorted(self._stats.items())
+            for command, stats in items:
+                for quantile in (0.5, 0.9, 0.99):
+                    lines.append(
+                        f'{prefix}_latency_seconds{{command="{command}",quantile="{quantile}"}} '
+                        f"{stats.latency.percentile(quantile * 100):.6f}"
+                    )
+                lines.append(
+                    f'{prefix}_latency_seconds_sum{{command="{command}"}} {stats.latency.sum:.6f}'
+                )
+                lines.append(
+                    f'{prefix}_latency_seconds_count{{command="{command}"}} {stats.latency.count}'
+                )
+            for name, attribute in (("errors", "errors"), ("timeouts", "timeouts")):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for command, stats in items:
+                    lines.append(
+                        f'{prefix}_{name}_total{{command="{command}"}} {getattr(stats, attribute)}'
+                    )
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path: str) -> None:
+        self._write(path, json.dumps(self.snapshot(), indent=2))
+
+    def dump_prometheus(self, path: str) -> None:
+        "Writes a file that the node exporter's textfile collector can pick up."
+        self._write(path, self.to_prometheus())
+
+    @staticmethod
+    def _write(path: str, content: str) -> None:
+        # Write and rename so readers never see a half written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
@@ -0,0 +1,250 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from services.tello_telemetry import TELEMETRY_DTYPE
+
+try:
+    from tello_controller import TelloActionType
+except ModuleNotFoundError:
+    from services.tello_controller import TelloActionType
+
+LOGGER = logging.getLogger(__name__)
+
+
+CONTROL_DTYPE = np.dtype(
+    [
+        ("t", "f8"),
+        ("right_velocity", "i1"),
+        ("forward_velocity", "i1"),
+        ("up_velocity", "i1"),
+        ("yaw_right_velocity", "i1"),
+    ]
+)
+"An RC vector that was sent to the drone."
+
+EVENT_DTYPE = np.dtype([("t", "f8"), ("event", "i1")])
+"A dispatched TelloActionType, stored by value."
+
+STREAM_DTYPES: Dict[str, np.dtype] = {
+    "state": TELEMETRY_DTYPE,
+    "control": CONTROL_DTYPE,
+    "events": EVENT_DTYPE,
+}
+
+_META_FILE = "meta.json"
+
+
+def _column_path(path: str, stream: str, field: str) -> str:
+    return os.path.join(path, f"{stream}.{field}.bin")
+
+
+class _ColumnWriter:
+    "Buffers rows of one stream and appends them column by column."
+
+    def __init__(self, path: str, stream: str, dtype: np.dtype, flush_rows: int):
+        self.dtype = dtype
+        self._buffer = np.zeros(flush_rows, dtype=dtype)
+        self._buffered = 0
+        self.rows = 0
+        self._files = {
+            name: open(_column_path(path, stream, name), "ab")
+            for name in dtype.names  # type: ignore
+        }
+
+    def append(self, record: Union[tuple, np.void]) -> bool:
+        "Returns True when the buffer is full and should be flushed."
+        self._buffer[self._buffered] = record
+        self._buffered += 1
+        return self._buffered == len(self._buffer)
+
+    def flush(self) -> None:
+        if self._buffered == 0:
+            return
+        rows = self._buffer[: self._buffered]
+        for name, file in self._files.items():
+            np.ascontiguousarray(rows[name]).tofile(file)
+            file.flush()
+        self.rows += self._buffered
+        self._buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        for file in self._files.values():
+            file.close()
+
+
+class FlightRecorder:
+    """
+    Records telemetry samples, sent RC vectors and dispatched events to a columnar flight log.
+
+    A flight log is a folder with one raw little endian file per column and stream,
+    plus a meta.json describing the dtypes. Every stream has a monotonic 't' column
+    that serves as its time index. Rows are buffered and appended in chunks, so
+    recording costs a few array writes per sample.
+
+    The recorder is thread safe. It can subscribe to a TelemetryRingBuffer and be
+    passed to the TelloCommandDispatcher.
+    """
+
+    def __init__(self, path: str, flush_rows: int = 256):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writers = {
+            stream: _ColumnWriter(path, stream, dtype, flush_rows)
+            for stream, dtype in STREAM_DTYPES.items()
+        }
+        self._closed = False
+        self._write_meta()
+        LOGGER.info(f"Recording flight to {path}")
+
+    def _write_meta(self) -> None:
+        # Converts the monotonic 't' columns to wall clock time, to line a flight
+        # up with logs and video: wall clock = t + offset
+        self.wall_clock_offset_secs = time.time() - time.monotonic()
+        meta = {
+            "version": 1,
+            "created": time.time(),
+            "wall_clock_offset_secs": self.wall_clock_offset_secs,
+            "streams": {
+                stream: {"fields": [[name, dtype[name].str] for name in dtype.names]}  # type: ignore
+                for stream, dtype in STREAM_DTYPES.items()
+            },
+        }
+        tmp_path = os.path.join(self.path, _META_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, _META_FILE))
+
+    def _append(self, stream: str, record: Union[tuple, np.void]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            writer = self._writers[stream]
+            if writer.append(record):
+                writer.flush()
+
+    def record_state(self, sample: Union[tuple, np.void]) -> None:
+        "Records a telemetry sample in TELEMETRY_DTYPE layout."
+        self._append("state", sample)
+
+    def record_control(
+        self, rc: Tuple[int, int, int, int], timestamp: Optional[float] = None
+    ) -> None:
+        "Records an RC vector as (right, forward, up, yaw right)."
+        self._append(
+            "control", (time.monotonic() if timestamp is None else timestamp, *rc)
+        )
+
+    def record_event(
+        self, event: TelloActionType, timestamp: Optional[float] = None
+    ) -> None:
+        self._append(
+            "events",
+            (time.monotonic() if timestamp is None else timestamp, event.value),
+        )
+
+    def flush(self) -> None:
+        with self._lock:
+            for writer in self._writers.values():
+                writer.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            for writer in self._writers.values():
+                writer.close()
+            self._closed = True
+        LOGGER.info(f"Flight log closed: {self.path}")
+
+    def __enter__(self) -> "FlightRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class FlightLog:
+    """
+    Reads a flight log written by the FlightRecorder.
+
+    Columns are memory mapped, so slicing a multi hour log by time only touches the
+    pages that are actually read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+        self.dtypes: Dict[str, np.dtype] = {
+            stream: np.dtype([(name, dtype) for name, dtype in info["fields"]])
+            for stream, info in meta["streams"].items()
+        }
+        self.wall_clock_offset_secs: Optional[float] = meta.get(
+            "wall_clock_offset_secs"
+        )
+        "Added to a 't' value gives the wall clock time. None for logs written before it was recorded."
+
+    def __len__(self) -> int:
+        return self.rows("state")
+
+    def rows(self, stream: str) -> int:
+        """
+        The number of complete rows in a stream. Derived from the file sizes so that
+        a log from a flight that crashed mid write can still be read.
+        """
+        dtype = self.dtypes[stream]
+        sizes = {
+            name: os.path.getsize(_column_path(self.path, stream, name))
+            for name in dtype.names  # type: ignore
+        }
+        return min(size // dtype[name].itemsize for name, size in sizes.items())
+
+    def column(self, stream: str, field: str) -> np.ndarray:
+        "A read only memory map of one column."
+        rows = self.rows(stream)
+        dtype = self.dtypes[stream][field]
+        if rows == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(
+            _column_path(self.path, stream, field), dtype=dtype, mode="r", shape=(rows,)
+        )
+
+    def columns(self, stream: str) -> Dict[str, np.ndarray]:
+        return {name: self.column(stream, name) for name in self.dtypes[stream].names}  # type: ignore
+
+    def to_wall_clock(self, t: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        "Converts monotonic 't' values to wall clock time, as time.time() would have returned."
+        if self.wall_clock_offset_secs is None:
+            raise ValueError(f"The flight log {self.path} has no wall clock offset")
+        return t + self.wall_clock_offset_secs
+
+    def time_range(self, stream: str) -> Optional[Tuple[float, float]]:
+        "The first and last timestamp of a stream, or None if it is empty."
+        t = self.column(stream, "t")
+        if len(t) == 0:
+            return None
+        return float(t[0]), float(t[-1])
+
+    def slice(
+        self, stream: str, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        The rows with start <= t < end, as memory mapped views per column.
+
+        The time index is searched with a binary search, so only the pages around
+        the boundaries are touched.
+        """
+        t = self.column(stream, "t")
+        first = 0 if start is None else int(np.searchsorted(t, start, side="left"))
+        last = len(t) if end is None else int(np.searchsorted(t, end, side="left"))
+        return {
+            name: column[first:last] for name, column in self.columns(stream).items()
+        }
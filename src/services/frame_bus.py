@@ -0,0 +1,260 @@
+import logging
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.sequenced_frame_reader import SequencedFrameReader
+
+LOGGER = logging.getLogger(__name__)
+
+
+_MAGIC = 0x54454C4C4F425553  # "TELLOBUS"
+_MAX_DIMS = 4
+_HEADER_FIELDS = 8 + _MAX_DIMS
+# Header layout, all int64: magic, latest seq, slot count, dtype char, ndim, reserved x3, shape
+_LATEST = 1
+_SLOTS = 2
+_DTYPE = 3
+_NDIM = 4
+_SHAPE = 8
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Opens existing shared memory without handing it to this process' resource tracker.
+
+    Only the creator may unlink the memory. Before Python 3.13 attaching registers the
+    memory with the resource tracker just like creating it (bpo-39959), so the tracker
+    of an unrelated process would unlink it when that process exits. 3.13 added
+    track=False for this. Workers started with multiprocessing share their parent's
+    tracker, so there the unregister also drops the creator's entry, which
+    _unlink_tracked restores.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore
+    memory = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(memory._name, "shared_memory")  # type: ignore
+    return memory
+
+
+def _unlink_tracked(memory: shared_memory.SharedMemory) -> None:
+    "Unlinks memory created by this process, see _attach_untracked."
+    if sys.version_info < (3, 13):
+        # unlink unregisters the name, which fails loudly in the tracker when a worker
+        # already unregistered it. Registering twice is harmless
+        resource_tracker.register(memory._name, "shared_memory")  # type: ignore
+    memory.unlink()
+
+
+class FrameBus:
+    """
+    A ring of frame slots in shared memory, for handing frames to worker processes without pickling.
+
+    One producer publishes frames; any number of processes attach by name and read
+    them in place. Every slot carries the sequence number of the frame it holds, and
+    the header holds the newest sequence number. Reading is lock free, in the style of
+    a seqlock: the producer marks a slot as being written, copies the frame and then
+    publishes its sequence number. A reader takes the newest frame as a view into
+    shared memory and calls is_valid(seq) when done to check it was not overwritten
+    meanwhile. A frame stays valid for slots - 1 further publishes.
+
+    Create the bus in the producer with FrameBus.create and attach in the workers with
+    FrameBus.attach(name). The shape and dtype are read from the header.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool):
+        self._memory = memory
+        self.owner = owner
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=memory.buf)
+        if self._header[0] != _MAGIC:
+            raise ValueError(f"Shared memory '{memory.name}' is not a frame bus")
+
+        self.slots = int(self._header[_SLOTS])
+        ndim = int(self._header[_NDIM])
+        shape_end = _SHAPE + ndim
+        self.shape: Tuple[int, ...] = tuple(
+            int(d) for d in self._header[_SHAPE:shape_end]
+        )
+        self.dtype = np.dtype(chr(int(self._header[_DTYPE])))
+
+        offset = self._header.nbytes
+        self._slot_seqs = np.ndarray(
+            (self.slots,), dtype=np.int64, buffer=memory.buf, offset=offset
+        )
+        offset += self._slot_seqs.nbytes
+        self._frames = np.ndarray(
+            (self.slots, *self.shape),
+            dtype=self.dtype,
+            buffer=memory.buf,
+            offset=offset,
+        )
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @classmethod
+    def create(
+        cls,
+        shape: Sequence[int],
+        dtype=np.uint8,
+        slots: int = 4,
+        name: Optional[str] = None,
+    ) -> "FrameBus":
+        "Creates a new bus for frames of the given shape. The creator owns and unlinks it."
+        if not 1 <= len(shape) <= _MAX_DIMS:
+            raise ValueError(f"Frames need 1 to {_MAX_DIMS} dimensions. Got {shape}")
+        if slots < 2:
+            raise ValueError(f"A frame bus needs at least 2 slots. Got {slots}")
+        dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(shape)) * dtype.itemsize
+        size = 8 * (_HEADER_FIELDS + slots) + slots * frame_bytes
+        memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=memory.buf)
+        header[:] = 0
+        header[_SLOTS] = slots
+        header[_DTYPE] = ord(dtype.char)
+        header[_NDIM] = len(shape)
+        shape_end = _SHAPE + len(shape)
+        header[_SHAPE:shape_end] = shape
+        slot_seqs = np.ndarray(
+            (slots,), dtype=np.int64, buffer=memory.buf, offset=header.nbytes
+        )
+        slot_seqs[:] = 0
+        header[0] = _MAGIC
+        LOGGER.debug(f"Created frame bus {memory.name} with {slots} slots of {shape}")
+        return cls(memory, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameBus":
+        "Attaches to an existing bus, for example from a worker process."
+        return cls(_attach_untracked(name), owner=False)
+
+    def publish(self, frame: np.ndarray) -> int:
+        """
+        Copies the frame into the next slot and makes it the latest.
+
+        Returns:
+            int: The frame's sequence number, starting at 1.
+        """
+        if frame.shape != self.shape:
+            raise ValueError(
+                f"Expected a frame of shape {self.shape}. Got {frame.shape}"
+            )
+        seq = int(self._header[_LATEST]) + 1
+        slot = seq % self.slots
+        # Mark the slot as being written so readers of the old frame see it is gone
+        self._slot_seqs[slot] = -1
+        self._frames[slot] = frame
+        self._slot_seqs[slot] = seq
+        self._header[_LATEST] = seq
+        return seq
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self._header[_LATEST])
+
+    def read_latest(self) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        The newest frame as a read only view into shared memory, without copying.
+
+        Returns:
+            Optional[Tuple[int, np.ndarray]]: The sequence number and the frame, or None if
+                nothing was published yet. Check is_valid(seq) after using the frame.
+        """
+        for _ in range(3):
+            seq = int(self._header[_LATEST])
+            if seq == 0:
+                return None
+            slot = seq % self.slots
+            if self._slot_seqs[slot] == seq:
+                view = self._frames[slot]
+                view.flags.writeable = False
+                return seq, view
+            # The producer lapped us between the two reads; try the new latest
+        return None
+
+    def is_valid(self, seq: int) -> bool:
+        "True while the frame with this sequence number has not been overwritten."
+        return int(self._slot_seqs[seq % self.slots]) == seq
+
+    def wait_for_next(
+        self,
+        after_seq: int,
+        timeout: Optional[float] = None,
+        poll_interval_secs: float = 0.001,
+    ) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Waits until a frame newer than after_seq is published and returns the newest one.
+
+        Returns:
+            Optional[Tuple[int, np.ndarray]]: As read_latest, or None on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while int(self._header[_LATEST]) <= after_seq:
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            time.sleep(poll_interval_secs)
+        return self.read_latest()
+
+    def close(self) -> None:
+        "Detaches from the shared memory. The owner also unlinks it."
+        # Drop the views before closing, the buffer cannot be released while they exist
+        del self._header, self._slot_seqs, self._frames
+        self._memory.close()
+        if self.owner:
+            _unlink_tracked(self._memory)
+
+
+class FrameBusPublisher:
+    """
+    Publishes every new frame of a SequencedFrameReader to a FrameBus, once per frame.
+
+    The bus is created for the shape of the first frame, so workers can attach once
+    bus_ready is set.
+    """
+
+    def __init__(self, reader: SequencedFrameReader, slots: int = 4):
+        self.reader = reader
+        self.slots = slots
+        self.bus: Optional[FrameBus] = None
+        self.bus_ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FrameBusPublisher":
+        self._thread = threading.Thread(
+            target=self._run, name="FrameBusPublisher", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1)
+            self._thread = None
+        if self.bus is not None:
+            self.bus.close()
+            self.bus = None
+
+    def _run(self) -> None:
+        seq = 0
+        while not self._stop.is_set():
+            if self.reader.stopped:
+                LOGGER.info("Video stream stopped")
+                break
+            sequenced = self.reader.wait_for_next_frame(seq, timeout=0.5)
+            if sequenced is None:
+                continue
+            seq = sequenced.seq
+            frame = sequenced.frame
+            if self.bus is None:
+                self.bus = FrameBus.create(frame.shape, frame.dtype, self.slots)
+                self.bus_ready.set()
+            self.bus.publish(frame)
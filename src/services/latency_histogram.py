@@ -0,0 +1,105 @@
+import math
+from typing import Dict, List
+
+
+class LatencyHistogram:
+    """
+    A low overhead latency histogram in the style of HdrHistogram.
+
+    Values are stored in microseconds in log-linear buckets: each power of two range
+    is split into the same number of linear sub buckets, which bounds the relative
+    error of every percentile (under 1% with the default 7 significant bits).
+    Recording is a couple of integer operations and a list increment.
+
+    Args:
+        significant_bits: The number of bits of precision kept per value.
+        max_value_secs: The largest latency that can be recorded. Larger values are clamped.
+    """
+
+    def __init__(self, significant_bits: int = 7, max_value_secs: float = 3600):
+        if significant_bits < 2:
+            raise ValueError(
+                f"At least 2 significant bits are needed. Got {significant_bits}"
+            )
+        self._sub_bucket_count = 1 << significant_bits
+        self._half_count = self._sub_bucket_count // 2
+        self._significant_bits = significant_bits
+        self._max_value_us = max(1, int(max_value_secs * 1_000_000))
+        self._counts: List[int] = [0] * (self._index_of(self._max_value_us) + 1)
+
+        self.count = 0
+        self._sum_us = 0
+        self._min_us = 0
+        self._max_us = 0
+
+    def _index_of(self, value_us: int) -> int:
+        if value_us < self._sub_bucket_count:
+            return value_us
+        exponent = value_us.bit_length() - self._significant_bits
+        base = self._sub_bucket_count + (exponent - 1) * self._half_count
+        return base + (value_us >> exponent) - self._half_count
+
+    def _value_at(self, index: int) -> int:
+        "The midpoint in microseconds of the values that map to the bucket."
+        if index < self._sub_bucket_count:
+            return index
+        exponent, offset = divmod(index - self._sub_bucket_count, self._half_count)
+        exponent += 1
+        lowest = (offset + self._half_count) << exponent
+        return lowest + ((1 << exponent) - 1) // 2
+
+    def record(self, value_secs: float) -> None:
+        value_us = min(max(0, int(value_secs * 1_000_000)), self._max_value_us)
+        self._counts[self._index_of(value_us)] += 1
+        if self.count == 0 or value_us < self._min_us:
+            self._min_us = value_us
+        if value_us > self._max_us:
+            self._max_us = value_us
+        self.count += 1
+        self._sum_us += value_us
+
+    def percentile(self, percentile: float) -> float:
+        "The latency in seconds below which the given percentage of values fall."
+        if self.count == 0:
+            return 0.0
+        target = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= target:
+                value_us = min(max(self._value_at(index), self._min_us), self._max_us)
+                return value_us / 1_000_000
+        return self._max_us / 1_000_000
+
+    @property
+    def min(self) -> float:
+        return self._min_us / 1_000_000
+
+    @property
+    def max(self) -> float:
+        return self._max_us / 1_000_000
+
+    @property
+    def sum(self) -> float:
+        return self._sum_us / 1_000_000
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def reset(self) -> None:
+        self._counts = [0] * len(self._counts)
+        self.count = 0
+        self._sum_us = 0
+        self._min_us = 0
+        self._max_us = 0
+
+    def to_dict(self, percentiles=(50, 90, 99, 99.9)) -> Dict[str, float]:
+        "A summary in seconds"
+        return {
+            "count": self.count,
+            "min": self.min,
+            "mean": self.mean,
+            "max": self.max,
+            **{f"p{p:g}": self.percentile(p) for p in percentiles},
+        }
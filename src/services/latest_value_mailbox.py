@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LatestValueMailbox(Generic[T]):
+    """
+    A single slot, thread safe mailbox that only ever holds the newest value.
+
+    Writers never block: a new value simply overwrites the previous one. Readers
+    can peek at the latest value or block until a value newer than the one they
+    have already seen arrives.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._value: Optional[T] = None
+        self._version = 0
+        self._timestamp = 0.0
+
+    def put(self, value: T) -> int:
+        """
+        Stores the value, replacing any previous one.
+
+        Returns:
+            int: The version number of the stored value.
+        """
+        with self._condition:
+            self._value = value
+            self._version += 1
+            self._timestamp = time.monotonic()
+            self._condition.notify_all()
+            return self._version
+
+    def get(self) -> Optional[T]:
+        "Returns the latest value without consuming it, or None if nothing was put yet."
+        with self._condition:
+            return self._value
+
+    def get_with_meta(self) -> Tuple[int, float, Optional[T]]:
+        """
+        Returns:
+            Tuple[int, float, Optional[T]]: The version, the monotonic time it was put and the value.
+        """
+        with self._condition:
+            return self._version, self._timestamp, self._value
+
+    def wait_for_new(
+        self, after_version: int, timeout: Optional[float] = None
+    ) -> Tuple[int, Optional[T]]:
+        """
+        Blocks until a value newer than after_version is available or the timeout expires.
+
+        Returns:
+            Tuple[int, Optional[T]]: The current version and value.
+                On timeout the version is unchanged.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._version > after_version, timeout)
+            return self._version, self._value
+
+    @property
+    def version(self) -> int:
+        with self._condition:
+            return self._version
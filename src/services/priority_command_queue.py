@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Deque, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from services.latency_histogram import LatencyHistogram
+
+T = TypeVar("T")
+
+
+class CommandPriority(IntEnum):
+    "Lower values are served first."
+
+    SAFETY = 0
+    "Emergency stops and landings. Always accepted and always served first."
+    ACTION = 1
+    "Discrete actions such as takeoff, flips and speed changes."
+
+
+class PriorityCommandQueue(Generic[T]):
+    """
+    A thread safe, bounded queue that serves commands by priority class and FIFO within a class.
+
+    - SAFETY commands are never rejected and go to the head of the line, ahead of
+      everything already queued.
+    - ACTION commands are rejected when their class is full.
+
+    RC vectors do not go through the queue. The RcTransmitter sends them at a fixed
+    rate on its own thread.
+
+    The time every command spends in the queue is recorded per priority class.
+
+    Args:
+        action_depth: The most ACTION commands that can be queued.
+    """
+
+    def __init__(self, action_depth: int = 16):
+        self._depths = {
+            CommandPriority.SAFETY: None,
+            CommandPriority.ACTION: action_depth,
+        }
+        self._queues: Dict[CommandPriority, Deque[Tuple[float, T]]] = {
+            priority: deque() for priority in CommandPriority
+        }
+        self._condition = threading.Condition()
+
+        self.queueing_delay = {
+            priority: LatencyHistogram() for priority in CommandPriority
+        }
+        "The time commands waited in the queue, per priority class."
+        self.enqueued = {priority: 0 for priority in CommandPriority}
+        self.dropped = {priority: 0 for priority in CommandPriority}
+        "Commands that were rejected because their class was full."
+
+    def put(self, item: T, priority: CommandPriority) -> bool:
+        """
+        Queues the item.
+
+        Returns:
+            bool: False if an ACTION was rejected because its class is full.
+        """
+        with self._condition:
+            queue = self._queues[priority]
+            depth = self._depths[priority]
+            if depth is not None and len(queue) >= depth:
+                self.dropped[priority] += 1
+                return False
+            queue.append((time.monotonic(), item))
+            self.enqueued[priority] += 1
+            self._condition.notify()
+            return True
+
+    def _pop(self) -> Optional[Tuple[CommandPriority, T]]:
+        for priority in CommandPriority:
+            queue = self._queues[priority]
+            if queue:
+                enqueued_at, item = queue.popleft()
+                self.queueing_delay[priority].record(time.monotonic() - enqueued_at)
+                return priority, item
+        return None
+
+    def get(
+        self, timeout: Optional[float] = None
+    ) -> Optional[Tuple[CommandPriority, T]]:
+        """
+        Removes and returns the highest priority command, waiting up to timeout for one.
+
+        Returns:
+            Optional[Tuple[CommandPriority, T]]: The priority and the command, or None on timeout.
+        """
+        with self._condition:
+            self._condition.wait_for(self._has_items, timeout)
+            return self._pop()
+
+    def get_nowait(self) -> Optional[Tuple[CommandPriority, T]]:
+        with self._condition:
+            return self._pop()
+
+    def _has_items(self) -> bool:
+        return any(self._queues.values())
+
+    def clear(self, priority: Optional[CommandPriority] = None) -> List[T]:
+        """
+        Removes the queued commands of one class, or of all classes.
+
+        Returns:
+            List[T]: The removed commands.
+        """
+        with self._condition:
+            priorities = list(CommandPriority) if priority is None else [priority]
+            removed: List[T] = []
+            for p in priorities:
+                removed.extend(item for _, item in self._queues[p])
+                self._queues[p].clear()
+            return removed
+
+    def qsize(self, priority: Optional[CommandPriority] = None) -> int:
+        with self._condition:
+            if priority is not None:
+                return len(self._queues[priority])
+            return sum(len(queue) for queue in self._queues.values())
+
+    def get_stats(self) -> Dict[str, dict]:
+        "Per class depth, counters and queueing delay summary in seconds"
+        with self._condition:
+            return {
+                priority.name.lower(): {
+                    "queued": len(self._queues[priority]),
+                    "enqueued": self.enqueued[priority],
+                    "dropped": self.dropped[priority],
+                    "queueing_delay_secs": self.queueing_delay[priority].to_dict(),
+                }
+                for priority in CommandPriority
+            }
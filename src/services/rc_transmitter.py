@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from services.latest_value_mailbox import LatestValueMailbox
+from services.realtime_loop import JitterStats
+from services.tello_command_dispatcher import TelloCommandDispatcher
+
+try:
+    from tello_controller import TelloActionType, TelloControlState
+except ModuleNotFoundError:
+    from services.tello_controller import TelloActionType, TelloControlState
+
+
+LOGGER = logging.getLogger(__name__)
+
+ZERO_RC = (0, 0, 0, 0)
+
+
+class RcTransmitter:
+    """
+    Sends the newest control state to the Tello at a fixed rate from a dedicated thread.
+
+    The controller side only submits states into a single slot mailbox, so a slow
+    controller poll never delays an RC packet and a fast one never costs extra
+    packets. The schedule is drift compensated: every tick is planned from the start
+    time rather than from the end of the previous tick.
+
+    Events are accumulated between ticks so none are lost when a state is overwritten
+    before it was sent.
+
+    With max_state_age_secs set, a zero RC vector is sent instead of the newest state
+    once the data behind that state is older than the bound, so the drone hovers while
+    the controller or detector hangs instead of flying on a stale velocity.
+    """
+
+    def __init__(
+        self,
+        dispatcher: TelloCommandDispatcher,
+        rate_hz: float = 20,
+        max_state_age_secs: Optional[float] = None,
+    ):
+        if rate_hz <= 0:
+            raise ValueError(f"The RC rate must be positive. Got {rate_hz}")
+        self.dispatcher = dispatcher
+        self.period_secs = 1 / rate_hz
+        self.max_state_age_secs = max_state_age_secs
+        self.mailbox = LatestValueMailbox[Tuple[TelloControlState, float]]()
+        self.jitter = JitterStats()
+        self.ticks = 0
+        self.missed_ticks = 0
+        "Ticks skipped because a previous tick overran by more than a period."
+        self.stale_ticks = 0
+        "Ticks that sent a zero RC vector because the newest state was too old."
+        self._stale = False
+
+        self._events_lock = threading.Lock()
+        self._pending_events: List[TelloActionType] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self, control_state: TelloControlState, data_timestamp: Optional[float] = None
+    ) -> None:
+        """
+        Hands the newest control state to the transmitter. Never blocks.
+
+        Args:
+            data_timestamp: The time.monotonic() at which the data the state was computed
+                from was captured, for example a frame's capture time. Defaults to now.
+        """
+        if control_state.events:
+            with self._events_lock:
+                self._pending_events.extend(control_state.events)
+        if data_timestamp is None:
+            data_timestamp = time.monotonic()
+        self.mailbox.put((control_state, data_timestamp))
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="RcTransmitter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _take_events(self) -> List[TelloActionType]:
+        with self._events_lock:
+            events = self._pending_events
+            self._pending_events = []
+        return events
+
+    def _is_stale(self, data_timestamp: float) -> bool:
+        if self.max_state_age_secs is None:
+            return False
+        age = time.monotonic() - data_timestamp
+        stale = age > self.max_state_age_secs
+        if stale and not self._stale:
+            LOGGER.warning(
+                f"Control state is {age * 1000:.0f}ms old, hovering until it is fresh"
+            )
+        elif self._stale and not stale:
+            LOGGER.info("Control state is fresh again")
+        self._stale = stale
+        return stale
+
+    def _tick(self) -> None:
+        item = self.mailbox.get()
+        if item is None:
+            return
+        state, data_timestamp = item
+        if self._is_stale(data_timestamp):
+            self.stale_ticks += 1
+            self.dispatcher.send_rc(ZERO_RC)
+        else:
+            self.dispatcher.send_rc(state.rc_vector())
+        events = self._take_events()
+        if events:
+            self.dispatcher.dispatch_events(events)
+
+    def _run(self) -> None:
+        period = self.period_secs
+        next_deadline = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now < next_deadline:
+                self._stop.wait(next_deadline - now)
+                if self._stop.is_set():
+                    break
+                now = time.monotonic()
+
+            self.jitter.record(now - next_deadline)
+            self.ticks += 1
+            try:
+                self._tick()
+            except Exception as e:
+                LOGGER.error(f"Error sending RC command: {e}")
+
+            next_deadline += period
+            behind = time.monotonic() - next_deadline
+            if behind > period:
+                # Do not burst to catch up, realign with the schedule instead
+                skipped = int(behind // period)
+                self.missed_ticks += skipped
+                next_deadline += skipped * period
+
+    def get_stats(self) -> dict:
+        "Tick counters and jitter percentiles in milliseconds"
+        return {
+            "ticks": self.ticks,
+            "missed_ticks": self.missed_ticks,
+            "stale_ticks": self.stale_ticks,
+            "jitter_ms": self.jitter.percentiles(),
+            **self.dispatcher.get_rc_stats(),
+        }
@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from services.latency_histogram import LatencyHistogram
+
+LOGGER = logging.getLogger(__name__)
+
+
+class JitterStats:
+    """
+    Keeps a rolling window of how late each tick fired compared to its schedule.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lateness_secs: Deque[float] = deque(maxlen=window)
+
+    def record(self, lateness_secs: float) -> None:
+        self._lateness_secs.append(lateness_secs)
+
+    def percentiles(self, percentiles=(50, 90, 99)) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: The lateness in milliseconds for each percentile, keyed as 'p50', 'p90', ...
+        """
+        samples = sorted(self._lateness_secs)
+        if not samples:
+            return {f"p{p}": 0.0 for p in percentiles}
+        last = len(samples) - 1
+        return {
+            f"p{p}": samples[min(last, round(p / 100 * last))] * 1000
+            for p in percentiles
+        }
+
+    def __len__(self) -> int:
+        return len(self._lateness_secs)
+
+
+class RealtimeLoop:
+    """
+    Runs an iteration on the calling thread at a fixed period, with a deadline for every iteration.
+
+    Iterations are scheduled from the start time, so the loop does not drift. An
+    iteration that takes longer than its deadline counts as an overrun. When an
+    iteration overruns by more than a period the skipped periods are counted as missed
+    and the schedule is realigned instead of running a burst of late iterations.
+
+    With a period of 0 the iterations run back to back, for loops that block on their
+    input themselves, like waiting for the next video frame. Such loops have no period
+    to derive a deadline from, so deadline_secs must be given. Their iterations call
+    start_deadline once their input arrived, so the wait does not count as work.
+
+    The loop only measures. Keeping stale commands off the drone while an iteration
+    hangs is the job of the RcTransmitter's max_state_age_secs failsafe.
+    """
+
+    def __init__(
+        self,
+        period_secs: float,
+        deadline_secs: Optional[float] = None,
+        name: str = "loop",
+    ):
+        """
+        Args:
+            period_secs: The time between the starts of two iterations.
+            deadline_secs: The longest an iteration may take. Defaults to the period,
+                and is required when the period is 0.
+            name: Used in log messages.
+        """
+        if period_secs < 0:
+            raise ValueError(f"The period cannot be negative. Got {period_secs}")
+        if deadline_secs is None:
+            if period_secs == 0:
+                raise ValueError("A loop with a period of 0 needs a deadline_secs")
+            deadline_secs = period_secs
+        if deadline_secs <= 0:
+            raise ValueError(f"The deadline must be positive. Got {deadline_secs}")
+        self.period_secs = period_secs
+        self.deadline_secs = deadline_secs
+        self.name = name
+
+        self.iterations = 0
+        self.overruns = 0
+        "Iterations that took longer than the deadline."
+        self.missed_periods = 0
+        "Periods skipped because an iteration overran by more than a period."
+        self.worst_overrun_secs = 0.0
+        self.jitter = JitterStats()
+        self.iteration_time = LatencyHistogram()
+        self._stop = threading.Event()
+        self._iteration_start = 0.0
+
+    def start_deadline(self) -> None:
+        "Starts the current iteration's deadline now, for iterations that first wait for input."
+        self._iteration_start = time.monotonic()
+
+    def stop(self) -> None:
+        "Ends the loop after the current iteration. Safe to call from any thread."
+        self._stop.set()
+
+    def run(self, iteration: Callable[[], Optional[bool]]) -> None:
+        """
+        Calls the iteration until it returns False or stop is called.
+
+        Exceptions raised by the iteration end the loop.
+        """
+        self._stop.clear()
+        period = self.period_secs
+        next_deadline = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now < next_deadline:
+                if self._stop.wait(next_deadline - now):
+                    break
+                now = time.monotonic()
+            if period > 0:
+                self.jitter.record(now - next_deadline)
+
+            self._iteration_start = time.monotonic()
+            keep_going = iteration()
+            elapsed = time.monotonic() - self._iteration_start
+            self.iterations += 1
+            self.iteration_time.record(elapsed)
+            if elapsed > self.deadline_secs:
+                self._overran(elapsed)
+            if keep_going is False:
+                break
+
+            if period == 0:
+                continue
+            next_deadline += period
+            behind = time.monotonic() - next_deadline
+            if behind > period:
+                skipped = int(behind // period)
+                self.missed_periods += skipped
+                next_deadline += skipped * period
+
+    def _overran(self, elapsed_secs: float) -> None:
+        overrun = elapsed_secs - self.deadline_secs
+        self.overruns += 1
+        self.worst_overrun_secs = max(self.worst_overrun_secs, overrun)
+        LOGGER.debug(
+            f"{self.name} iteration overran its {self.deadline_secs * 1000:.0f}ms deadline "
+            f"by {overrun * 1000:.1f}ms"
+        )
+
+    def get_stats(self) -> dict:
+        "Iteration counters, jitter percentiles in milliseconds and iteration times"
+        return {
+            "iterations": self.iterations,
+            "overruns": self.overruns,
+            "overrun_ratio": self.overruns / self.iterations
+            if self.iterations
+            else 0.0,
+            "worst_overrun_ms": self.worst_overrun_secs * 1000,
+            "missed_periods": self.missed_periods,
+            "jitter_ms": self.jitter.percentiles(),
+            "iteration_secs": self.iteration_time.to_dict(percentiles=(50, 99)),
+        }
@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+from djitellopy import BackgroundFrameRead
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SequencedFrame(NamedTuple):
+    seq: int
+    "Monotonic frame number, starting at 1."
+    timestamp: float
+    "The time.monotonic() at which the decoded frame became available."
+    frame: np.ndarray
+
+
+class _SignallingFrameRead(BackgroundFrameRead):
+    """
+    A BackgroundFrameRead that hands every decoded frame to its SequencedFrameReader.
+
+    djitellopy creates the BackgroundFrameRead itself, so the SequencedFrameReader
+    switches the class of that instance to this one. Only the frame setter and stop
+    are extended, the state of the instance is untouched.
+    """
+
+    sequenced_reader: Optional["SequencedFrameReader"] = None
+
+    @BackgroundFrameRead.frame.setter
+    def frame(self, value):
+        BackgroundFrameRead.frame.fset(self, value)  # type: ignore
+        reader = self.sequenced_reader
+        if reader is not None:
+            reader._on_frame(value)
+
+    def stop(self):
+        super().stop()
+        reader = self.sequenced_reader
+        if reader is not None:
+            reader._on_stopped()
+
+
+class SequencedFrameReader:
+    """
+    Numbers the frames of a djitellopy BackgroundFrameRead so each one can be processed exactly once.
+
+    BackgroundFrameRead replaces its frame array for every decoded frame but offers no
+    way to tell whether a frame is new. The reader hooks into the frame read's frame
+    setter, so every decoded frame is stamped with a sequence number and a capture
+    time on the decoder thread and waiting consumers are woken up right away. Frames
+    decoded before the reader was created, like the placeholder the frame read starts
+    with, are not counted.
+    """
+
+    def __init__(self, frame_read: BackgroundFrameRead):
+        if frame_read.with_queue:
+            raise ValueError("Frame reads with a queue are not supported")
+        self.frame_read = frame_read
+        self._condition = threading.Condition()
+        self._latest: Optional[SequencedFrame] = None
+        self._seq = 0
+        self._stop = threading.Event()
+
+        # Attach before switching the class, so no frame set after the switch is missed
+        frame_read.sequenced_reader = self  # type: ignore
+        if not isinstance(frame_read, _SignallingFrameRead):
+            if type(frame_read) is not BackgroundFrameRead:
+                raise TypeError(
+                    f"Expected a BackgroundFrameRead. Got {type(frame_read).__name__}"
+                )
+            frame_read.__class__ = _SignallingFrameRead
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set() or self.frame_read.stopped
+
+    def _on_frame(self, frame: Optional[np.ndarray]) -> None:
+        "Called on the decoder thread for every new frame."
+        if frame is None or self._stop.is_set():
+            return
+        with self._condition:
+            self._seq += 1
+            self._latest = SequencedFrame(self._seq, time.monotonic(), frame)
+            self._condition.notify_all()
+
+    def _on_stopped(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+
+    def latest(self) -> Optional[SequencedFrame]:
+        "The newest frame, or None if no frame was decoded yet."
+        with self._condition:
+            return self._latest
+
+    @property
+    def seq(self) -> int:
+        latest = self.latest()
+        return 0 if latest is None else latest.seq
+
+    def wait_for_next_frame(
+        self, after_seq: int = 0, timeout: Optional[float] = None
+    ) -> Optional[SequencedFrame]:
+        """
+        Blocks until a frame newer than after_seq is available.
+
+        Frames that arrived while the caller was busy are skipped; the newest is returned.
+
+        Returns:
+            Optional[SequencedFrame]: The newest frame, or None on timeout or when the stream stopped.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._has_frame_after(after_seq) or self.stopped, timeout
+            )
+            latest = self._latest
+        if latest is None or latest.seq <= after_seq:
+            return None
+        return latest
+
+    def _has_frame_after(self, seq: int) -> bool:
+        return self._latest is not None and self._latest.seq > seq
+
+    def stop(self) -> None:
+        "Stops numbering frames. The underlying BackgroundFrameRead keeps running."
+        self._stop.set()
+        if getattr(self.frame_read, "sequenced_reader", None) is self:
+            self.frame_read.sequenced_reader = None  # type: ignore
+        self._on_stopped()
@@ -1,5 +1,10 @@
 import logging
-from services.tello_connector import TelloConnector
+import time
+from typing import Callable, Optional, Sequence, Tuple
+from services.action_executor import ActionExecutor
+from services.flight_recorder import FlightRecorder
+from services.priority_command_queue import CommandPriority
+from services.tello_connector import TelloConnector, clamp_speed_cm_s
 
 try:
     from tello_controller import TelloActionType, TelloControlState
@@ -18,15 +23,48 @@ class TelloCommandDispatcher:
     speed_cm_s = 10
     "The speed of the Tello in cm/s. Default is 10 cm/s."
 
-    def __init__(self, tello: TelloConnector):
+    rc_keepalive_secs = 1.0
+    """
+    The longest time an unchanged RC vector is suppressed before it is sent again.
+    Keeps the link alive well inside the drone's 15 second auto-land timeout.
+    """
+
+    def __init__(
+        self,
+        tello: TelloConnector,
+        executor: Optional[ActionExecutor] = None,
+        recorder: Optional[FlightRecorder] = None,
+    ):
+        """
+        Args:
+            tello: The connector to send the commands through.
+            executor: When given, discrete actions run on the executor's worker
+                so they do not block the RC stream. Otherwise they run inline.
+            recorder: When given, every transmitted RC vector and dispatched event is recorded.
+        """
         self.tello = tello
+        self.executor = executor
+        self.recorder = recorder
         self.tello.set_speed_cm_s(self.speed_cm_s)
 
+        # Shadow of the last RC vector that was actually transmitted
+        self._last_rc: Optional[Tuple[int, int, int, int]] = None
+        self._last_rc_sent_at = 0.0
+
+        self.rc_packets_sent = 0
+        "The number of RC packets sent to the Tello."
+        self.rc_packets_suppressed = 0
+        "The number of RC packets skipped because the vector had not changed."
+
     def _adjust_speed(self, delta: int) -> None:
         """
-        Adjusts the speed of the Tello drone by the given delta.
+        Adjusts the speed of the Tello drone by the given delta, within the valid range.
         """
-        self.speed_cm_s += delta
+        speed_cm_s = clamp_speed_cm_s(self.speed_cm_s + delta)
+        if speed_cm_s == self.speed_cm_s:
+            LOGGER.info(f"Speed already at its limit of {speed_cm_s} cm/s")
+            return
+        self.speed_cm_s = speed_cm_s
         self.tello.set_speed_cm_s(self.speed_cm_s)
         LOGGER.info(f"Speed adjusted to {self.speed_cm_s} cm/s")
 
@@ -42,36 +80,100 @@ class TelloCommandDispatcher:
         """
         self._adjust_speed(-10)
 
+    def send_rc(self, rc: Tuple[int, int, int, int]) -> bool:
+        """
+        Sends the RC vector unless it matches the last one sent and the keepalive has not expired.
+
+        Returns:
+            bool: True if a packet was sent.
+        """
+        now = time.monotonic()
+        if rc == self._last_rc and now - self._last_rc_sent_at < self.rc_keepalive_secs:
+            self.rc_packets_suppressed += 1
+            return False
+
+        self.tello.send_rc_control(*rc)
+        self._last_rc = rc
+        self._last_rc_sent_at = now
+        self.rc_packets_sent += 1
+        if self.recorder is not None:
+            self.recorder.record_control(rc, now)
+        return True
+
+    def get_rc_stats(self) -> dict:
+        "Counters for the RC packets sent and suppressed"
+        total = self.rc_packets_sent + self.rc_packets_suppressed
+        return {
+            "sent": self.rc_packets_sent,
+            "suppressed": self.rc_packets_suppressed,
+            "suppressed_ratio": self.rc_packets_suppressed / total if total else 0.0,
+        }
+
     def send_commands(self, control_state: TelloControlState):
         "Send the commands to the Tello based on the control state"
 
-        self.tello.send_rc_control(
-            control_state.right_velocity,
-            control_state.forward_velocity,
-            control_state.up_velocity,
-            control_state.yaw_right_velocity,
-        )
-
-        # Process events
-        for event in control_state.events:
-            if event == TelloActionType.TAKEOFF:
-                if not self.tello.is_flying():
-                    self.tello.take_off()
-                else:
-                    LOGGER.info("Drone is already flying")
-            elif event == TelloActionType.LAND:
-                self.tello.land()
+        self.send_rc(control_state.rc_vector())
+
+        self.dispatch_events(control_state.events)
+
+    def _take_off(self) -> None:
+        if not self.tello.is_flying():
+            self.tello.take_off()
+        else:
+            LOGGER.info("Drone is already flying")
+
+    def _get_action(self, event: TelloActionType) -> Optional[Callable[[], None]]:
+        "Maps an event to the blocking call that carries it out"
+        if event == TelloActionType.TAKEOFF:
+            return self._take_off
+        elif event == TelloActionType.LAND:
+            return self.tello.land
+        elif event == TelloActionType.EMERGENCY_LAND:
+            return self.tello.emergency_stop
+        elif event == TelloActionType.INCREASE_SPEED_CM_S:
+            return self.increase_speed
+        elif event == TelloActionType.DECREASE_SPEED_CM_S:
+            return self.decrease_speed
+        elif event == TelloActionType.FLIP_FORWARD:
+            return self.tello.flip_forward
+        elif event == TelloActionType.FLIP_BACK:
+            return self.tello.flip_back
+        elif event == TelloActionType.FLIP_RIGHT:
+            return self.tello.flip_right
+        elif event == TelloActionType.FLIP_LEFT:
+            return self.tello.flip_left
+        return None
+
+    def _run_and_reset_rc(self, action: Callable[[], None]) -> None:
+        action()
+        # Discrete actions reset the drone's RC state, so resend on the next tick
+        self._last_rc = None
+
+    def dispatch_events(self, events: Sequence[TelloActionType]) -> None:
+        "Run the discrete actions requested by the controller"
+        for event in events:
+            action = self._get_action(event)
+            if action is None:
+                LOGGER.warning(f"No action for event {event}")
+                continue
+            if self.recorder is not None:
+                self.recorder.record_event(event)
+
+            if self.executor is None:
+                self._run_and_reset_rc(action)
             elif event == TelloActionType.EMERGENCY_LAND:
-                self.tello.emergency_stop()
-            elif event == TelloActionType.INCREASE_SPEED_CM_S:
-                self.increase_speed()
-            elif event == TelloActionType.DECREASE_SPEED_CM_S:
-                self.decrease_speed()
-            elif event == TelloActionType.FLIP_FORWARD:
-                self.tello.flip_forward()
-            elif event == TelloActionType.FLIP_BACK:
-                self.tello.flip_back()
-            elif event == TelloActionType.FLIP_RIGHT:
-                self.tello.flip_right()
-            elif event == TelloActionType.FLIP_LEFT:
-                self.tello.flip_left()
+                # Safety first: never wait behind a queued takeoff or flip
+                self.executor.preempt(event.name, action)
+                self._last_rc = None
+            else:
+                priority = CommandPriority.ACTION
+                if event == TelloActionType.LAND:
+                    # Landing overtakes queued takeoffs and flips and cancels them,
+                    # so they do not run on the ground or take off again
+                    self.executor.cancel(CommandPriority.ACTION)
+                    priority = CommandPriority.SAFETY
+                self.executor.submit(
+                    event.name,
+                    lambda action=action: self._run_and_reset_rc(action),
+                    priority=priority,
+                )
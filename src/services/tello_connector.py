@@ -1,9 +1,34 @@
 import logging
 import time
+from dataclasses import dataclass
+from typing import Dict, Optional
 from djitellopy import Tello, BackgroundFrameRead
+from services.command_metrics import CommandMetrics
+from services.sequenced_frame_reader import SequencedFrame, SequencedFrameReader
+from services.tello_telemetry import TelemetryRingBuffer, TelloStatePoller
 
 LOGGER = logging.getLogger(__name__)
 
+MIN_SPEED_CM_S = 10
+MAX_SPEED_CM_S = 100
+
+
+def clamp_speed_cm_s(cm_s: int) -> int:
+    "Limits a speed to the range the Tello accepts."
+    return max(MIN_SPEED_CM_S, min(MAX_SPEED_CM_S, cm_s))
+
+
+@dataclass
+class DeviceShadow:
+    "The connector's view of the drone's state, as left by the last successful commands."
+
+    sdk_mode: bool = False
+    "Whether the drone was put into SDK mode with 'command'. connect always sends it, it is the handshake."
+    speed_cm_s: Optional[int] = None
+    "The last speed that was acknowledged, None until one is and after a failed speed command."
+    stream_on: bool = False
+    flying: bool = False
+
 
 class TelloConnector:
     """
@@ -11,6 +36,7 @@ class TelloConnector:
 
     Attributes:
         tello: An instance of the Tello class for low-level communication with the drone.
+        shadow: The last known device state, used to skip a repeated takeoff, streamon, streamoff or speed.
 
     Methods:
         connect: Establishes a connection with the Tello drone.
@@ -18,6 +44,9 @@ class TelloConnector:
         streamoff: Stops the video stream from the Tello drone.
         streamon: Starts the video stream from the Tello drone.
         get_frame_read: Returns an instance of BackgroundFrameRead for reading frames from the video stream.
+        get_sequenced_frame_read: Returns a SequencedFrameReader that numbers the decoded frames.
+        get_telemetry: Returns a TelemetryRingBuffer that is fed with every state packet.
+        wait_for_next_frame: Blocks until a frame newer than a given sequence number is decoded.
         takeoff: Initiates the takeoff sequence of the Tello drone.
         land: Initiates the landing sequence of the Tello drone.
         send_rc_control: Sends RC control commands to the Tello drone for manual control.
@@ -26,41 +55,188 @@ class TelloConnector:
 
     def __init__(self, tello: Tello):
         self.tello = tello
+        self.time_to_ready_secs: Optional[float] = None
+        "How long the last connect took until the drone answered consistently."
+        self.time_to_first_frame_secs: Optional[float] = None
+        "How long the last streamon took until the first decoded frame arrived."
+        self.metrics = CommandMetrics()
+        "Round trip latency histograms, error and timeout counters per command."
+        self._sequenced_frame_read: Optional[SequencedFrameReader] = None
+        self._state_poller: Optional[TelloStatePoller] = None
+        self.shadow = DeviceShadow()
+        "The last known device state. A repeated takeoff, streamon, streamoff or speed is not sent."
+        self.commands_skipped: Dict[str, int] = {}
+        "The number of redundant commands per command name that were answered locally."
+
+    def connect(
+        self,
+        required_answers: int = 2,
+        probe_timeout_secs: float = 0.5,
+        initial_backoff_secs: float = 0.05,
+        max_backoff_secs: float = 0.8,
+        ready_timeout_secs: float = 10.0,
+    ):
+        """
+        Enters SDK mode and returns as soon as the drone answers consistently.
 
-    def connect(self):
-        self.tello.connect()
-        for second in range(3, 0, -1):
-            LOGGER.info(f"Connecting in {second}")
-            time.sleep(1)
+        Instead of a fixed countdown the drone is probed with short 'battery?' queries,
+        spaced with an exponential backoff after every failed probe.
 
-        LOGGER.debug("Connected to Tello")
+        Args:
+            required_answers: The number of consecutive valid answers that mean ready.
+            probe_timeout_secs: How long to wait for the answer to a single probe.
+            initial_backoff_secs: The wait after the first failed probe.
+            max_backoff_secs: The upper bound of the wait between probes.
+            ready_timeout_secs: Give up after this long.
+
+        Raises:
+            TimeoutError: If the drone is not ready in time.
+        """
+        start = time.monotonic()
+        with self.metrics.time("connect"):
+            self.tello.connect()
+
+        answers = 0
+        backoff = initial_backoff_secs
+        while answers < required_answers:
+            if time.monotonic() - start > ready_timeout_secs:
+                raise TimeoutError(
+                    f"Tello was not ready after {ready_timeout_secs} seconds"
+                )
+            if self._probe(probe_timeout_secs):
+                answers += 1
+                continue
+
+            answers = 0
+            LOGGER.debug(f"Tello not ready yet, probing again in {backoff:.2f}s")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff_secs)
+
+        # Drop late answers to timed out probes so they are not read as the next response
+        self.tello.get_own_udp_object()["responses"].clear()
+
+        self.shadow.sdk_mode = True
+        # The drone may have restarted with its default speed
+        self.shadow.speed_cm_s = None
+        self.time_to_ready_secs = time.monotonic() - start
+        LOGGER.info(f"Connected to Tello in {self.time_to_ready_secs:.3f}s")
+
+    def _probe(self, timeout_secs: float) -> bool:
+        "Asks the drone for its battery level and checks that the answer is valid."
+        response = self.tello.send_command_with_return(
+            "battery?", timeout=timeout_secs  # type: ignore
+        )
+        try:
+            return 0 <= int(response) <= 100
+        except (TypeError, ValueError):
+            LOGGER.debug(f"Invalid readiness probe response: '{response}'")
+            return False
+
+    def _skip(self, command: str, reason: str) -> None:
+        "Counts a command that is answered from the shadow instead of being sent."
+        self.commands_skipped[command] = self.commands_skipped.get(command, 0) + 1
+        LOGGER.debug(f"Not sending '{command}': {reason}")
 
     def streamoff(self):
-        self.tello.streamoff()
+        if not self.shadow.stream_on and not self.tello.stream_on:
+            self._skip("streamoff", "video stream already off")
+            return
+        with self.metrics.time("streamoff"):
+            self.tello.streamoff()
+        self.shadow.stream_on = False
         LOGGER.debug("Video stream off")
 
-    def streamon(self):
-        LOGGER.info("Restarting video stream")
-        time.sleep(1)
-        self.streamoff()
-        time.sleep(1)
-        self.tello.streamon()
-        LOGGER.info("Video stream on")
+    def streamon(self, first_frame_timeout_secs: float = 10.0) -> bool:
+        """
+        Starts the video stream and waits until the first frame has been decoded.
+
+        The stream is only switched on if it is not on already. The time until the
+        first frame is stored in time_to_first_frame_secs.
+
+        Returns:
+            bool: True if a frame arrived before the timeout.
+        """
+        start = time.monotonic()
+        if self.shadow.stream_on or self.tello.stream_on:
+            self._skip("streamon", "video stream already on")
+        else:
+            with self.metrics.time("streamon"):
+                self.tello.streamon()
+        self.shadow.stream_on = True
+
+        # The reader starts with a placeholder frame that is not numbered
+        remaining = first_frame_timeout_secs - (time.monotonic() - start)
+        if self.wait_for_next_frame(0, max(remaining, 0)) is None:
+            LOGGER.warning(
+                f"No video frame received after {first_frame_timeout_secs} seconds"
+            )
+            return False
+
+        self.time_to_first_frame_secs = time.monotonic() - start
+        LOGGER.info(
+            f"Video stream on, first frame after {self.time_to_first_frame_secs:.3f}s"
+        )
+        return True
 
     def get_frame_read(self) -> BackgroundFrameRead:
         LOGGER.debug("Getting frame read")
         return self.tello.get_frame_read()
 
+    def get_sequenced_frame_read(self) -> SequencedFrameReader:
+        """
+        Returns the reader that gives every decoded frame a sequence number and a capture time.
+
+        The reader is shared, so every consumer sees the same numbering.
+        """
+        frame_read = self.get_frame_read()
+        reader = self._sequenced_frame_read
+        if reader is None or reader.frame_read is not frame_read or reader.stopped:
+            reader = SequencedFrameReader(frame_read)
+            self._sequenced_frame_read = reader
+        return reader
+
+    def wait_for_next_frame(
+        self, after_seq: int = 0, timeout: Optional[float] = None
+    ) -> Optional[SequencedFrame]:
+        """
+        Blocks until a frame newer than after_seq has been decoded.
+
+        Pass the seq of the last processed frame to handle every frame exactly once.
+
+        Returns:
+            Optional[SequencedFrame]: The newest frame with its seq and capture time, or None on timeout.
+        """
+        return self.get_sequenced_frame_read().wait_for_next_frame(after_seq, timeout)
+
+    def get_telemetry(self) -> TelemetryRingBuffer:
+        """
+        Returns the ring buffer that receives every state packet the drone sends.
+
+        The buffer is fed from djitellopy's state, starting with the first call.
+        """
+        if self._state_poller is None:
+            self._state_poller = TelloStatePoller(self.tello.get_current_state).start()
+        return self._state_poller.buffer
+
     def take_off(self):
+        if self.is_flying():
+            self._skip("takeoff", "already flying")
+            return
         LOGGER.info("Taking off...")
-        self.tello.takeoff()
+        with self.metrics.time("takeoff"):
+            self.tello.takeoff()
+        self.shadow.flying = True
 
     def is_flying(self) -> bool:
-        return self.tello.is_flying
+        return self.shadow.flying or self.tello.is_flying
 
     def land(self):
+        # Always sent, like emergency. The shadow misses a takeoff that timed out but
+        # flew, or a drone that was already flying when the connector was created
         LOGGER.info("Landing...")
-        self.tello.land()
+        with self.metrics.time("land"):
+            self.tello.land()
+        self.shadow.flying = False
 
     def send_rc_control(
         self,
@@ -77,28 +253,57 @@ class TelloConnector:
         )
 
     def emergency_stop(self) -> None:
-        self.tello.emergency()
+        # Always sent, the shadow may be wrong about the motors
+        with self.metrics.time("emergency"):
+            self.tello.emergency()
+        self.shadow.flying = False
 
-    def set_speed_cm_s(self, cm_s: int) -> None:
+    def set_speed_cm_s(self, cm_s: int) -> int:
         """Set speed to x cm/s.
         Arguments:
-            x: 10-100
+            x: 10-100. Values outside the range are clamped.
+
+        Returns:
+            int: The speed the drone is set to.
         """
-        assert 10 <= cm_s <= 100
-        self.tello.set_speed(cm_s)
+        clamped = clamp_speed_cm_s(cm_s)
+        if clamped != cm_s:
+            LOGGER.warning(f"Speed {cm_s} cm/s is out of range, using {clamped} cm/s")
+        if clamped == self.shadow.speed_cm_s:
+            self._skip("speed", f"speed already {clamped} cm/s")
+            return clamped
+        # A failed or timed out command may still have reached the drone
+        self.shadow.speed_cm_s = None
+        with self.metrics.time("speed"):
+            self.tello.set_speed(clamped)
+        self.shadow.speed_cm_s = clamped
+        return clamped
 
     def end(self) -> None:
         LOGGER.debug("Ending Tello service")
+        LOGGER.debug(f"Command metrics: {self.metrics.snapshot()}")
+        LOGGER.debug(f"Commands answered locally: {self.commands_skipped}")
+        if self._sequenced_frame_read is not None:
+            self._sequenced_frame_read.stop()
+            self._sequenced_frame_read = None
+        if self._state_poller is not None:
+            self._state_poller.stop()
+            self._state_poller = None
         self.tello.end()
+        self.shadow = DeviceShadow()
 
     def flip_forward(self) -> None:
-        self.tello.flip_forward()
+        with self.metrics.time("flip_forward"):
+            self.tello.flip_forward()
 
     def flip_back(self) -> None:
-        self.tello.flip_back()
+        with self.metrics.time("flip_back"):
+            self.tello.flip_back()
 
     def flip_left(self) -> None:
-        self.tello.flip_left()
+        with self.metrics.time("flip_left"):
+            self.tello.flip_left()
 
     def flip_right(self) -> None:
-        self.tello.flip_right()
+        with self.metrics.time("flip_right"):
+            self.tello.flip_right()
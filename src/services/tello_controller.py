@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from enum import Enum
-from typing import List
+from typing import MutableSequence, Sequence, Tuple
 
 
 class TelloActionType(Enum):
@@ -16,11 +16,19 @@ class TelloActionType(Enum):
     FLIP_RIGHT = 8
 
 
-@dataclass
+NO_EVENTS: Tuple[TelloActionType, ...] = ()
+"A shared, immutable empty event sequence for ticks without events."
+
+
+@dataclass(slots=True)
 class TelloControlState:
     """
     This state represents the desired state for the tello.
     A digital twin of the tello that should be sent to the tello so it can try and replicate it
+
+    The class is slotted to keep instances small. In hot loops a single instance can be
+    reused with update(), and trusted() / update(validate=False) skip the range checks for
+    values that are already known to be valid.
     """
 
     # The control range [-100, 100]
@@ -37,8 +45,8 @@ class TelloControlState:
     up_velocity: int
     yaw_right_velocity: int
 
-    # A list of events coming from the controller
-    events: List[TelloActionType]
+    # The events coming from the controller
+    events: Sequence[TelloActionType] = NO_EVENTS
 
     def __post_init__(self):
         self.validate_direction("right_velocity", self.right_velocity)
@@ -54,8 +62,76 @@ class TelloControlState:
                 f"Value {value} for attribute '{attribute_name}' is not in the range [{self.MIN_VAL}, {self.MAX_VAL}]"
             )
 
+    @classmethod
+    def trusted(
+        cls,
+        right_velocity: int,
+        forward_velocity: int,
+        up_velocity: int,
+        yaw_right_velocity: int,
+        events: Sequence[TelloActionType] = NO_EVENTS,
+    ) -> "TelloControlState":
+        """
+        Creates a state without validating it.
+        Only use this for values that are already clamped to [MIN_VAL, MAX_VAL].
+        """
+        state = object.__new__(cls)
+        state.right_velocity = right_velocity
+        state.forward_velocity = forward_velocity
+        state.up_velocity = up_velocity
+        state.yaw_right_velocity = yaw_right_velocity
+        state.events = events
+        return state
+
+    def update(
+        self,
+        right_velocity: int,
+        forward_velocity: int,
+        up_velocity: int,
+        yaw_right_velocity: int,
+        events: Sequence[TelloActionType] = NO_EVENTS,
+        validate: bool = True,
+    ) -> "TelloControlState":
+        "Updates the state in place so one instance can be reused every tick."
+        if validate:
+            self.validate_direction("right_velocity", right_velocity)
+            self.validate_direction("forward_velocity", forward_velocity)
+            self.validate_direction("up_velocity", up_velocity)
+            self.validate_direction("yaw_right_velocity", yaw_right_velocity)
+        self.right_velocity = right_velocity
+        self.forward_velocity = forward_velocity
+        self.up_velocity = up_velocity
+        self.yaw_right_velocity = yaw_right_velocity
+        self.events = events
+        return self
+
+    def rc_vector(self) -> Tuple[int, int, int, int]:
+        "The velocities in the order of the Tello's rc command"
+        return (
+            self.right_velocity,
+            self.forward_velocity,
+            self.up_velocity,
+            self.yaw_right_velocity,
+        )
+
+    def write_to(self, out: MutableSequence[int], offset: int = 0) -> None:
+        """
+        Writes the velocities into a preallocated buffer, such as an array.array('b')
+        or a NumPy array, in the order of rc_vector().
+        """
+        out[offset] = self.right_velocity
+        out[offset + 1] = self.forward_velocity
+        out[offset + 2] = self.up_velocity
+        out[offset + 3] = self.yaw_right_velocity
+
     def to_dict(self):
-        return asdict(self)
+        return {
+            "right_velocity": self.right_velocity,
+            "forward_velocity": self.forward_velocity,
+            "up_velocity": self.up_velocity,
+            "yaw_right_velocity": self.yaw_right_velocity,
+            "events": list(self.events),
+        }
 
 
 class TelloController(ABC):
@@ -1,6 +1,15 @@
+import threading
 import time
+from typing import Callable, Dict, List, Optional
+
 import cv2
+import numpy as np
 
+from services.latency_histogram import LatencyHistogram
+from services.latest_value_mailbox import LatestValueMailbox
+from services.rc_transmitter import RcTransmitter
+from services.realtime_loop import RealtimeLoop
+from services.sequenced_frame_reader import SequencedFrameReader
 from services.tello_command_dispatcher import TelloCommandDispatcher
 from services.tello_controller import TelloController
 from .tello_connector import TelloConnector
@@ -10,35 +19,174 @@ import logging
 LOGGER = logging.getLogger(__name__)
 
 
+class StageStats:
+    "Throughput and per iteration latency of one pipeline stage"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.iterations = 0
+        self.latency = LatencyHistogram()
+        self._started = time.monotonic()
+
+    def record(self, latency_secs: float) -> None:
+        self.iterations += 1
+        self.latency.record(latency_secs)
+
+    def to_dict(self) -> dict:
+        elapsed = time.monotonic() - self._started
+        return {
+            "iterations": self.iterations,
+            "throughput_hz": self.iterations / elapsed if elapsed > 0 else 0.0,
+            "latency_secs": self.latency.to_dict(percentiles=(50, 99)),
+        }
+
+
 class FrontEnd:
+    """
+    Runs the controller, the command dispatch, the video and the display as a staged pipeline.
+
+    - input: polls the controller at a fixed cadence in a RealtimeLoop and submits its
+      state to the RC transmitter.
+    - dispatch: the RcTransmitter, which sends the newest state at a fixed rate.
+    - video: picks up new decoded frames and posts them to a latest-value mailbox.
+    - display: shows the newest frame after every controller poll.
+
+    Input and display run on the thread that calls run, which must be the main thread.
+    The pygame controllers pump SDL events, and SDL and the OpenCV windows only work
+    on the main thread on macOS. Only dispatch and video run on worker threads.
+
+    The stages only share single slot, latest-value mailboxes, so a slow display drops
+    frames instead of delaying RC commands.
+    """
+
     def __init__(
         self,
         dispatcher: TelloCommandDispatcher,
         tello_service: TelloConnector,
         controller: TelloController,
+        rc_rate_hz: float = 20,
+        max_state_age_secs: Optional[float] = None,
     ):
+        """
+        Args:
+            rc_rate_hz: The rate at which RC commands are sent.
+            max_state_age_secs: Hover when the controller state is older than this.
+        """
         self.dispatcher = dispatcher
         self.tello_service = tello_service
         self.controller = controller
+        self.transmitter = RcTransmitter(dispatcher, rc_rate_hz, max_state_age_secs)
+        self.frames: LatestValueMailbox[np.ndarray] = LatestValueMailbox()
 
-    def run(self, cadence_secs: float = 0):
-        frame_read = self.tello_service.get_frame_read()
-        while True:
-            time.sleep(cadence_secs)
-            controller_state = self.controller.get_state()
-            self.dispatcher.send_commands(controller_state)
+        self.stats: Dict[str, StageStats] = {
+            name: StageStats(name) for name in ("input", "video", "display")
+        }
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._input_loop: Optional[RealtimeLoop] = None
 
-            if frame_read.stopped:
-                frame_read.stop()
-                break
+    def _start_stage(self, name: str, target: Callable[[], None]) -> None:
+        thread = threading.Thread(target=target, name=f"FrontEnd-{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
 
-            frame = frame_read.frame
-            if frame is not None:
-                cv2.imshow("Tello Stream", frame)
+    def _poll_controller(self) -> None:
+        start = time.perf_counter()
+        try:
+            self.transmitter.submit(self.controller.get_state())
+        except Exception as e:
+            LOGGER.error(f"Error reading the controller: {e}")
+        else:
+            self.stats["input"].record(time.perf_counter() - start)
 
-            key = cv2.waitKey(1) & 0xFF
-            if key == 27:  # ESC key
+    def _video_stage(self, reader: SequencedFrameReader) -> None:
+        stats = self.stats["video"]
+        seq = 0
+        while not self._stop.is_set():
+            if reader.stopped:
+                LOGGER.info("Video stream stopped")
+                self._stop.set()
                 break
-            iteration += 1
+            sequenced = reader.wait_for_next_frame(seq, timeout=0.1)
+            if sequenced is None:
+                continue
+            start = time.perf_counter()
+            seq = sequenced.seq
+            self.frames.put(sequenced.frame)
+            stats.record(time.perf_counter() - start)
+
+    def _show_frame(self, version: int) -> int:
+        "Shows the newest frame if it is newer than version. Returns the shown version."
+        start = time.perf_counter()
+        new_version, frame = self.frames.wait_for_new(version, timeout=0)
+        is_new = new_version != version and frame is not None
+        if is_new:
+            cv2.imshow("Tello Stream", frame)
+
+        # Keep the window responsive even when no new frame arrived
+        key = cv2.waitKey(1) & 0xFF
+        if key == 27:  # ESC key
+            self._stop.set()
+        if is_new:
+            self.stats["display"].record(time.perf_counter() - start)
+        return new_version
+
+    def _main_stages(self, loop: RealtimeLoop) -> None:
+        "Polls the controller and refreshes the display on the calling thread."
+        version = 0
+
+        def iteration() -> bool:
+            nonlocal version
+            self._poll_controller()
+            version = self._show_frame(version)
+            return not self._stop.is_set()
+
+        loop.run(iteration)
+
+    def get_stats(self) -> dict:
+        stats = {
+            **{name: stage.to_dict() for name, stage in self.stats.items()},
+            "dispatch": self.transmitter.get_stats(),
+        }
+        if self._input_loop is not None:
+            stats["input_loop"] = self._input_loop.get_stats()
+        return stats
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._input_loop is not None:
+            self._input_loop.stop()
+
+    def run(self, cadence_secs: Optional[float] = None):
+        """
+        Runs the pipeline until ESC is pressed or the video stream stops.
+
+        Must be called on the main thread, the controller and the window are served on it.
 
-        self.tello_service.end()
+        Args:
+            cadence_secs: The time between two controller polls. Defaults to the RC period.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("FrontEnd.run must be called on the main thread")
+        if cadence_secs is None:
+            cadence_secs = self.transmitter.period_secs
+        if cadence_secs <= 0:
+            raise ValueError(f"The cadence must be positive. Got {cadence_secs}")
+        reader = self.tello_service.get_sequenced_frame_read()
+        frame_read = reader.frame_read
+        self._stop.clear()
+        input_loop = RealtimeLoop(cadence_secs, name="controller")
+        self._input_loop = input_loop
+        self.transmitter.start()
+        self._start_stage("video", lambda: self._video_stage(reader))
+        try:
+            self._main_stages(input_loop)
+        finally:
+            self.stop()
+            for thread in self._threads:
+                thread.join(1)
+            self._threads = []
+            self.transmitter.stop()
+            frame_read.stop()
+            LOGGER.info(f"FrontEnd stats: {self.get_stats()}")
+            self.tello_service.end()
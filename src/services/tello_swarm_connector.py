@@ -0,0 +1,225 @@
+import logging
+import selectors
+import socket
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from services.tello_connector import clamp_speed_cm_s
+
+LOGGER = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+RcVector = Tuple[int, int, int, int]
+
+
+class TelloSwarmConnector:
+    """
+    Controls many Tello drones in station mode over one non-blocking UDP socket.
+
+    Unlike one TelloConnector per drone, there are no per drone sockets or threads.
+    Commands that expect an answer are sent to every drone at once and the answers
+    are collected with a selector until all arrived or the timeout expired. RC vectors
+    are fanned out in a single send pass.
+
+    The connector is not thread safe. Use it from one thread, for example the control loop.
+
+    Args:
+        drones: The drones, as IP addresses or (IP, command port) tuples.
+        local_port: The local port to bind to. 0 picks a free port.
+        command_timeout_secs: The default time to wait for answers.
+    """
+
+    CONTROL_UDP_PORT = 8889
+    RESPONSE_TIMEOUT_SECS = 7.0
+    TAKEOFF_TIMEOUT_SECS = 20.0
+    SEND_BUFFER_TIMEOUT_SECS = 1.0
+
+    def __init__(
+        self,
+        drones: Sequence[Union[str, Address]],
+        local_port: int = 0,
+        command_timeout_secs: float = RESPONSE_TIMEOUT_SECS,
+    ):
+        self.addresses: List[Address] = [
+            (drone, self.CONTROL_UDP_PORT) if isinstance(drone, str) else drone
+            for drone in drones
+        ]
+        if len(set(self.addresses)) != len(self.addresses):
+            raise ValueError("Every drone needs a unique address")
+        self.command_timeout_secs = command_timeout_secs
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._socket.bind(("0.0.0.0", local_port))
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._socket, selectors.EVENT_READ)
+
+        self.unsolicited_responses = 0
+        self.rc_packets_sent = 0
+        self.packets_dropped = 0
+        "Packets that could not be sent because the send buffer stayed full."
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def _drain(self, pending: Dict[Address, Optional[str]]) -> None:
+        "Reads every datagram that is waiting and stores the answers of pending drones."
+        while True:
+            try:
+                data, address = self._socket.recvfrom(1024)
+            except (BlockingIOError, InterruptedError):
+                return
+            except ConnectionRefusedError:
+                # An ICMP error for a previous send. The drone will time out
+                continue
+            if address in pending and pending[address] is None:
+                pending[address] = data.decode("utf-8", errors="replace").rstrip("\r\n")
+            else:
+                self.unsolicited_responses += 1
+                LOGGER.debug(f"Dropping unsolicited response from {address}")
+
+    def _send(self, payload: bytes, address: Address) -> None:
+        try:
+            self._socket.sendto(payload, address)
+            return
+        except BlockingIOError:
+            pass
+
+        # The send buffer is full. Wait until it drains instead of dropping the packet
+        deadline = time.monotonic() + self.SEND_BUFFER_TIMEOUT_SECS
+        self._selector.modify(self._socket, selectors.EVENT_WRITE)
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._selector.select(remaining)
+                try:
+                    self._socket.sendto(payload, address)
+                    return
+                except BlockingIOError:
+                    continue
+        finally:
+            self._selector.modify(self._socket, selectors.EVENT_READ)
+        self.packets_dropped += 1
+        LOGGER.warning(f"Send buffer still full, dropping packet to {address}")
+
+    def send_command(
+        self,
+        command: Union[str, Sequence[str]],
+        timeout_secs: Optional[float] = None,
+        indices: Optional[Sequence[int]] = None,
+    ) -> List[Optional[str]]:
+        """
+        Sends a command to the selected drones and collects their answers concurrently.
+
+        Args:
+            command: One command for all drones or one command per selected drone.
+            timeout_secs: How long to wait for all the answers.
+            indices: The drones to send to. Defaults to all of them.
+
+        Returns:
+            List[Optional[str]]: The answers in the order of the selected drones.
+                None for drones that did not answer in time.
+        """
+        selected = range(len(self.addresses)) if indices is None else indices
+        addresses = [self.addresses[i] for i in selected]
+        commands = (
+            [command] * len(addresses) if isinstance(command, str) else list(command)
+        )
+        if len(commands) != len(addresses):
+            raise ValueError(
+                f"Got {len(commands)} commands for {len(addresses)} drones"
+            )
+
+        # Answers to earlier commands that timed out must not be read as new answers
+        self._drain({})
+
+        pending: Dict[Address, Optional[str]] = {address: None for address in addresses}
+        for address, text in zip(addresses, commands):
+            self._send(text.encode("utf-8"), address)
+
+        timeout = self.command_timeout_secs if timeout_secs is None else timeout_secs
+        deadline = time.monotonic() + timeout
+        while any(answer is None for answer in pending.values()):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if self._selector.select(remaining):
+                self._drain(pending)
+
+        missing = [address for address, answer in pending.items() if answer is None]
+        if missing:
+            LOGGER.warning(f"No answer to '{command}' from {missing}")
+        return [pending[address] for address in addresses]
+
+    def send_control_command(
+        self,
+        command: Union[str, Sequence[str]],
+        timeout_secs: Optional[float] = None,
+        indices: Optional[Sequence[int]] = None,
+    ) -> List[bool]:
+        """
+        Sends a command that the drones acknowledge with 'ok'.
+
+        Returns:
+            List[bool]: Whether each selected drone acknowledged the command.
+        """
+        return [
+            answer is not None and "ok" in answer.lower()
+            for answer in self.send_command(command, timeout_secs, indices)
+        ]
+
+    def send_command_without_return(self, command: str) -> None:
+        payload = command.encode("utf-8")
+        for address in self.addresses:
+            self._send(payload, address)
+
+    def send_rc_control(self, vectors: Sequence[RcVector]) -> None:
+        """
+        Sends one RC vector per drone in a single pass over the socket.
+
+        Args:
+            vectors: (left/right, forward/back, up/down, yaw) per drone, in drone order.
+        """
+        if len(vectors) != len(self.addresses):
+            raise ValueError(
+                f"Got {len(vectors)} RC vectors for {len(self.addresses)} drones"
+            )
+        send = self._send
+        for address, (right, forward, up, yaw) in zip(self.addresses, vectors):
+            send(f"rc {right} {forward} {up} {yaw}".encode("ascii"), address)
+        self.rc_packets_sent += len(vectors)
+
+    def connect(self, timeout_secs: Optional[float] = None) -> List[bool]:
+        "Puts every drone into SDK mode."
+        connected = self.send_control_command("command", timeout_secs)
+        LOGGER.info(f"{sum(connected)} of {len(connected)} drones connected")
+        return connected
+
+    def take_off(self) -> List[bool]:
+        return self.send_control_command("takeoff", self.TAKEOFF_TIMEOUT_SECS)
+
+    def land(self) -> List[bool]:
+        return self.send_control_command("land")
+
+    def emergency_stop(self) -> None:
+        "Stops all motors of every drone immediately."
+        self.send_command_without_return("emergency")
+
+    def set_speed_cm_s(self, cm_s: int) -> List[bool]:
+        "Sets the speed of every drone. Values outside 10-100 cm/s are clamped."
+        clamped = clamp_speed_cm_s(cm_s)
+        if clamped != cm_s:
+            LOGGER.warning(f"Speed {cm_s} cm/s is out of range, using {clamped} cm/s")
+        return self.send_control_command(f"speed {clamped}")
+
+    def query_battery(self) -> List[Optional[int]]:
+        return [
+            int(answer) if answer is not None and answer.isdigit() else None
+            for answer in self.send_command("battery?")
+        ]
+
+    def end(self) -> None:
+        self._selector.close()
+        self._socket.close()
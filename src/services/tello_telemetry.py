@@ -0,0 +1,322 @@
+import logging
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+
+TELEMETRY_DTYPE = np.dtype(
+    [
+        ("t", "f8"),  # Monotonic receive time in seconds
+        ("pitch", "i2"),  # Degrees
+        ("roll", "i2"),  # Degrees
+        ("yaw", "i2"),  # Degrees
+        ("vgx", "i2"),  # dm/s
+        ("vgy", "i2"),  # dm/s
+        ("vgz", "i2"),  # dm/s
+        ("templ", "i2"),  # Lowest temperature °C
+        ("temph", "i2"),  # Highest temperature °C
+        ("tof", "i2"),  # Time of flight distance cm
+        ("h", "i2"),  # Height cm
+        ("bat", "i2"),  # Battery %
+        ("baro", "f4"),  # Barometer m
+        ("time", "i2"),  # Motor on time s
+        ("agx", "f4"),  # Acceleration 0.001g
+        ("agy", "f4"),
+        ("agz", "f4"),
+    ]
+)
+"One state packet as a NumPy record."
+
+_STATE_FIELDS = TELEMETRY_DTYPE.names[1:]  # type: ignore
+
+
+def parse_state_packet(data: bytes, timestamp: float) -> Optional[tuple]:
+    """
+    Parses a 'key:value;key:value;' state packet into a tuple matching TELEMETRY_DTYPE.
+
+    Fields missing from the packet are set to 0.
+
+    Returns:
+        Optional[tuple]: The record, or None if the packet is not a state packet.
+    """
+    try:
+        text = data.decode("ascii")
+    except UnicodeDecodeError:
+        return None
+
+    values: Dict[str, str] = {}
+    for item in text.strip().split(";"):
+        key, _, value = item.partition(":")
+        values[key] = value
+    return state_to_record(values, timestamp)
+
+
+def state_to_record(state: Mapping[str, Any], timestamp: float) -> Optional[tuple]:
+    """
+    Converts a state dict, like djitellopy's get_current_state(), into a tuple matching TELEMETRY_DTYPE.
+
+    Fields missing from the state are set to 0.
+
+    Returns:
+        Optional[tuple]: The record, or None if the dict is not a state.
+    """
+    if "bat" not in state:
+        return None
+
+    try:
+        return (timestamp,) + tuple(
+            float(state.get(name) or 0) for name in _STATE_FIELDS
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+class TelemetryRingBuffer:
+    """
+    A preallocated ring buffer of telemetry samples backed by a NumPy structured array.
+
+    The storage is mirrored: every sample is written twice, capacity apart, so the
+    newest n samples always form one contiguous slice. That makes window() a view
+    instead of a copy. Views stay valid until the buffer wraps around them, so copy
+    them if they need to be kept.
+
+    There is a single writer, normally the TelloStatePoller of the TelloConnector or the
+    receiver thread of the TelloTelemetryService.
+    Subscribers are called on the writer's thread with a view of the new sample.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive. Got {capacity}")
+        self.capacity = capacity
+        self._storage = np.zeros(2 * capacity, dtype=TELEMETRY_DTYPE)
+        self._count = 0
+        self._subscribers: List[Callable[[np.void], None]] = []
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def total_samples(self) -> int:
+        "The number of samples appended since the buffer was created."
+        return self._count
+
+    def append(self, record: tuple) -> None:
+        "Appends a record in TELEMETRY_DTYPE field order."
+        position = self._count % self.capacity
+        self._storage[position] = record
+        self._storage[position + self.capacity] = record
+        self._count += 1
+
+        if self._subscribers:
+            sample = self._storage[position + self.capacity]
+            for callback in self._subscribers:
+                try:
+                    callback(sample)
+                except Exception as e:
+                    LOGGER.error(f"Telemetry subscriber failed: {e}")
+
+    def append_packet(self, data: bytes, timestamp: Optional[float] = None) -> bool:
+        """
+        Parses a raw state packet and appends it.
+
+        Returns:
+            bool: False if the packet could not be parsed.
+        """
+        record = parse_state_packet(
+            data, time.monotonic() if timestamp is None else timestamp
+        )
+        if record is None:
+            return False
+        self.append(record)
+        return True
+
+    def append_state(
+        self, state: Mapping[str, Any], timestamp: Optional[float] = None
+    ) -> bool:
+        """
+        Appends an already parsed state dict.
+
+        Returns:
+            bool: False if the dict is not a state.
+        """
+        record = state_to_record(
+            state, time.monotonic() if timestamp is None else timestamp
+        )
+        if record is None:
+            return False
+        self.append(record)
+        return True
+
+    def latest(self) -> Optional[np.void]:
+        "The newest sample as a view into the buffer, or None if it is empty."
+        count = self._count
+        if count == 0:
+            return None
+        return self._storage[(count - 1) % self.capacity + self.capacity]
+
+    def window(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        The newest n samples, oldest first, as a view into the buffer.
+
+        Args:
+            n: The number of samples. Defaults to all the samples held.
+        """
+        count = self._count
+        available = min(count, self.capacity)
+        n = available if n is None else min(n, available)
+        if n <= 0:
+            return self._storage[:0]
+        end = (count - 1) % self.capacity + self.capacity + 1
+        start = end - n
+        return self._storage[start:end]
+
+    def since(self, timestamp: float) -> np.ndarray:
+        "The samples received at or after the given monotonic time, as a view."
+        samples = self.window()
+        start = np.searchsorted(samples["t"], timestamp, side="left")
+        return samples[start:]
+
+    def subscribe(self, callback: Callable[[np.void], None]) -> Callable[[], None]:
+        """
+        Calls the callback with every new sample.
+
+        Returns:
+            Callable[[], None]: A function that removes the subscription.
+        """
+        self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return unsubscribe
+
+
+class TelloTelemetryService:
+    """
+    Receives the state packets the Tello sends to port 8890 and feeds them into a TelemetryRingBuffer.
+
+    djitellopy's Tello binds port 8890 itself, so this service is meant for sessions
+    driven by the AsyncTelloConnector, the swarm connector or the simulator. In
+    djitellopy sessions TelloConnector.get_telemetry() feeds the buffer through a
+    TelloStatePoller instead.
+
+    Args:
+        buffer: The ring buffer to fill. A new one is created if omitted.
+        host: The local address to listen on.
+        port: The local state port.
+        drone_host: Only accept packets from this address, if given.
+    """
+
+    STATE_UDP_PORT = 8890
+
+    def __init__(
+        self,
+        buffer: Optional[TelemetryRingBuffer] = None,
+        host: str = "0.0.0.0",
+        port: int = STATE_UDP_PORT,
+        drone_host: Optional[str] = None,
+    ):
+        self.buffer = buffer if buffer is not None else TelemetryRingBuffer()
+        self.drone_host = drone_host
+        self.invalid_packets = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self._socket.settimeout(0.2)
+        self.port = self._socket.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "TelloTelemetryService":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="TelloTelemetry", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._socket.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data, address = self._socket.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                LOGGER.error(f"Telemetry socket error: {e}")
+                break
+            if self.drone_host is not None and address[0] != self.drone_host:
+                continue
+            if not self.buffer.append_packet(data):
+                self.invalid_packets += 1
+
+
+class TelloStatePoller:
+    """
+    Feeds a TelemetryRingBuffer from a state that is received by someone else, like djitellopy's Tello.
+
+    djitellopy owns port 8890 and replaces its state dict with a new one for every
+    packet. The poller looks at get_state every poll_interval_secs and appends every
+    new dict once. The sample time is when the poller saw the dict, so it is up to
+    poll_interval_secs late. The drone sends its state at about 10 Hz.
+
+    Args:
+        get_state: Returns the newest state dict, like Tello.get_current_state.
+        buffer: The ring buffer to fill. A new one is created if omitted.
+        poll_interval_secs: How often to look for a new state.
+    """
+
+    def __init__(
+        self,
+        get_state: Callable[[], Mapping[str, Any]],
+        buffer: Optional[TelemetryRingBuffer] = None,
+        poll_interval_secs: float = 0.02,
+    ):
+        self.get_state = get_state
+        self.buffer = buffer if buffer is not None else TelemetryRingBuffer()
+        self.poll_interval_secs = poll_interval_secs
+        self.invalid_states = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "TelloStatePoller":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="TelloStatePoller", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        last_state = None
+        while not self._stop.wait(self.poll_interval_secs):
+            try:
+                state = self.get_state()
+            except Exception as e:
+                LOGGER.error(f"Could not read the Tello state: {e}")
+                continue
+            if state is last_state or not state:
+                continue
+            last_state = state
+            if not self.buffer.append_state(state):
+                self.invalid_states += 1
@@ -1,7 +1,329 @@
+import logging
+import socket
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from services.sequenced_frame_reader import SequencedFrameReader
 from services.tello_connector import TelloConnector
 
+LOGGER = logging.getLogger(__name__)
+
+
+RAW_FRAME_HEADER = struct.Struct("!IdHHBI")
+"""
+Header sent before every frame on the raw frame socket:
+sequence number, capture time (epoch seconds), height, width, channels, payload length.
+The payload is the frame as uint8 RGB bytes.
+"""
+
+_MJPEG_BOUNDARY = b"tellotvframe"
+
 
 class TelloTV:
+    """
+    A local video relay that decodes the Tello stream once and serves it to many consumers.
 
-    def __init__(self, connector: TelloConnector):
+    - MJPEG over HTTP for dashboards (serve_mjpeg)
+    - a raw frame TCP socket for analysis processes (serve_raw)
+    - a video file recorder (start_recording)
+
+    Every frame is encoded at most once per format, however many subscribers there are.
+    The encoded payload is cached with the frame's sequence number and reused by every
+    subscriber. Slow subscribers skip frames instead of holding up the others.
+
+    Frames from djitellopy are RGB, so they are converted to BGR for the OpenCV encoders.
+
+    The servers listen on 127.0.0.1 unless another host is passed. Binding to 0.0.0.0
+    publishes the drone's camera to the whole network.
+    """
+
+    def __init__(
+        self,
+        connector: TelloConnector,
+        jpeg_quality: int = 80,
+    ):
         self.connector = connector
+        self.jpeg_quality = jpeg_quality
+
+        self._condition = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self._seq = 0
+        self._captured_at = 0.0
+        self._payloads: Dict[str, Tuple[int, bytes]] = {}
+        self._encode_locks: Dict[str, threading.Lock] = {
+            "jpeg": threading.Lock(),
+            "raw": threading.Lock(),
+        }
+        self._encoders: Dict[str, Callable[[np.ndarray, int, float], bytes]] = {
+            "jpeg": self._encode_jpeg,
+            "raw": self._encode_raw,
+        }
+
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._servers: List[socketserver.BaseServer] = []
+        self._recording = threading.Event()
+
+        # The counters are changed by the relay and by every subscriber's thread
+        self._stats_lock = threading.Lock()
+        self.encodes: Dict[str, int] = {name: 0 for name in self._encoders}
+        "How many times each format was encoded."
+        self.deliveries: Dict[str, int] = {name: 0 for name in self._encoders}
+        "How many payloads of each format were sent to subscribers."
+        self.subscribers = 0
+
+    def _start_thread(self, target: Callable[[], None], name: str) -> None:
+        thread = threading.Thread(target=target, name=f"TelloTV-{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self) -> "TelloTV":
+        "Starts relaying the frames of the connector's video stream."
+        reader = self.connector.get_sequenced_frame_read()
+        self._stop.clear()
+        self._start_thread(lambda: self._relay(reader), "relay")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._recording.clear()
+        with self._condition:
+            self._condition.notify_all()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()  # type: ignore
+        self._servers = []
+        for thread in self._threads:
+            thread.join(1)
+        self._threads = []
+
+    def _relay(self, reader: SequencedFrameReader) -> None:
+        seq = 0
+        while not self._stop.is_set():
+            if reader.stopped:
+                LOGGER.info("Video stream stopped")
+                break
+            sequenced = reader.wait_for_next_frame(seq, timeout=0.5)
+            if sequenced is None:
+                continue
+            seq = sequenced.seq
+            # Subscribers get epoch times, the reader stamps frames with the monotonic clock
+            captured_at = time.time() - (time.monotonic() - sequenced.timestamp)
+            self.publish(sequenced.frame, captured_at)
+
+    def publish(self, frame: np.ndarray, captured_at: Optional[float] = None) -> int:
+        """
+        Makes a new frame available to every subscriber.
+
+        Returns:
+            int: The frame's sequence number.
+        """
+        with self._condition:
+            self._frame = frame
+            self._seq += 1
+            self._captured_at = time.time() if captured_at is None else captured_at
+            self._condition.notify_all()
+            return self._seq
+
+    def wait_for_frame(
+        self, after_seq: int, timeout: Optional[float] = None
+    ) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Waits for a frame newer than after_seq.
+
+        Returns:
+            Tuple[int, Optional[np.ndarray]]: The sequence number and the frame.
+                The sequence number is unchanged on timeout or stop.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._seq > after_seq or self._stop.is_set(), timeout
+            )
+            return self._seq, self._frame
+
+    def get_payload(
+        self, fmt: str, after_seq: int, timeout: Optional[float] = None
+    ) -> Tuple[int, Optional[bytes]]:
+        """
+        Waits for a frame newer than after_seq and returns it encoded in the given format.
+
+        The first subscriber to ask for a frame in a format encodes it; everybody else
+        gets the cached payload.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._seq > after_seq or self._stop.is_set(), timeout
+            )
+            seq, frame, captured_at = self._seq, self._frame, self._captured_at
+            cached = self._payloads.get(fmt)
+        if frame is None or seq <= after_seq:
+            return after_seq, None
+        if cached is not None and cached[0] == seq:
+            self._count_delivery(fmt)
+            return seq, cached[1]
+
+        with self._encode_locks[fmt]:
+            cached = self._payloads.get(fmt)
+            if cached is None or cached[0] != seq:
+                payload = self._encoders[fmt](frame, seq, captured_at)
+                with self._stats_lock:
+                    self.encodes[fmt] += 1
+                cached = (seq, payload)
+                with self._condition:
+                    current = self._payloads.get(fmt)
+                    # Never replace a newer payload with an older one
+                    if current is None or current[0] < seq:
+                        self._payloads[fmt] = cached
+        self._count_delivery(fmt)
+        return cached
+
+    def _count_delivery(self, fmt: str) -> None:
+        with self._stats_lock:
+            self.deliveries[fmt] += 1
+
+    def _add_subscriber(self, delta: int) -> None:
+        with self._stats_lock:
+            self.subscribers += delta
+
+    def _encode_jpeg(self, frame: np.ndarray, seq: int, captured_at: float) -> bytes:
+        ok, buffer = cv2.imencode(
+            ".jpg",
+            cv2.cvtColor(frame, cv2.COLOR_RGB2BGR),
+            [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality],
+        )
+        if not ok:
+            raise ValueError(f"Could not encode frame {seq} as JPEG")
+        jpeg = buffer.tobytes()
+        return (
+            b"--" + _MJPEG_BOUNDARY + b"\r\n"
+            b"Content-Type: image/jpeg\r\n"
+            b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n"
+        )
+
+    def _encode_raw(self, frame: np.ndarray, seq: int, captured_at: float) -> bytes:
+        height, width = frame.shape[:2]
+        channels = 1 if frame.ndim == 2 else frame.shape[2]
+        data = np.ascontiguousarray(frame, dtype=np.uint8).tobytes()
+        header = RAW_FRAME_HEADER.pack(
+            seq, captured_at, height, width, channels, len(data)
+        )
+        return header + data
+
+    def _stream(self, fmt: str, write: Callable[[bytes], None]) -> None:
+        "Sends every new payload of the format until the subscriber goes away."
+        self._add_subscriber(1)
+        seq = 0
+        try:
+            while not self._stop.is_set():
+                seq, payload = self.get_payload(fmt, seq, timeout=0.5)
+                if payload is not None:
+                    write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            LOGGER.debug(f"{fmt} subscriber disconnected")
+        finally:
+            self._add_subscriber(-1)
+
+    def serve_mjpeg(self, host: str = "127.0.0.1", port: int = 8080) -> int:
+        """
+        Serves the stream as MJPEG at http://host:port/ on a background thread.
+
+        Only this machine can connect by default. Pass host="0.0.0.0" to serve the
+        whole network.
+
+        Returns:
+            int: The port the server listens on.
+        """
+        tv = self
+
+        class _MjpegHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header(
+                    "Content-Type",
+                    "multipart/x-mixed-replace; boundary=" + _MJPEG_BOUNDARY.decode(),
+                )
+                self.end_headers()
+                tv._stream("jpeg", self.wfile.write)
+
+            def log_message(self, format, *args):
+                LOGGER.debug(format % args)
+
+        server = ThreadingHTTPServer((host, port), _MjpegHandler)
+        server.daemon_threads = True
+        return self._serve(server, "mjpeg")
+
+    def serve_raw(self, host: str = "127.0.0.1", port: int = 8081) -> int:
+        """
+        Serves raw frames over TCP, each prefixed with a RAW_FRAME_HEADER.
+
+        Returns:
+            int: The port the server listens on.
+        """
+        tv = self
+
+        class _RawHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                tv._stream("raw", self.request.sendall)
+
+        server = socketserver.ThreadingTCPServer((host, port), _RawHandler)
+        server.daemon_threads = True
+        return self._serve(server, "raw")
+
+    def _serve(self, server: socketserver.TCPServer, name: str) -> int:
+        self._servers.append(server)
+        self._start_thread(server.serve_forever, name)
+        host, port = server.server_address[:2]
+        LOGGER.info(f"TelloTV serving {name} on {host}:{port}")
+        return port
+
+    def start_recording(self, path: str, fps: float = 30) -> None:
+        "Writes every new frame to a video file until stop_recording is called."
+        if self._recording.is_set():
+            raise RuntimeError("Already recording")
+        self._recording.set()
+        self._start_thread(lambda: self._record(path, fps), "recorder")
+
+    def stop_recording(self) -> None:
+        self._recording.clear()
+
+    def _record(self, path: str, fps: float) -> None:
+        writer: Optional[cv2.VideoWriter] = None
+        seq = 0
+        self._add_subscriber(1)
+        try:
+            while self._recording.is_set() and not self._stop.is_set():
+                new_seq, frame = self.wait_for_frame(seq, timeout=0.5)
+                if frame is None or new_seq == seq:
+                    continue
+                seq = new_seq
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # type: ignore
+                    writer = cv2.VideoWriter(path, fourcc, fps, (width, height), True)
+                    LOGGER.info(f"Recording to {path}")
+                writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+        finally:
+            self._add_subscriber(-1)
+            if writer is not None:
+                writer.release()
+                LOGGER.info(f"Recording saved to {path}")
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            frames = self._seq
+        with self._stats_lock:
+            return {
+                "frames": frames,
+                "subscribers": self.subscribers,
+                "encodes": dict(self.encodes),
+                "deliveries": dict(self.deliveries),
+            }
@@ -0,0 +1,277 @@
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional, Tuple
+
+import av
+import numpy as np
+
+from services.latency_histogram import LatencyHistogram
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_UDP_PAYLOAD = 1460
+"The Tello splits frames into datagrams of this size. A shorter datagram ends a frame."
+
+
+class DecodedFrame(NamedTuple):
+    seq: int
+    "Monotonic frame number, starting at 1. Gaps are frames that were dropped."
+    timestamp: float
+    "The time.monotonic() at which the frame was decoded."
+    frame: np.ndarray
+    decode_secs: float
+    "How long the decoder took for this frame."
+    queue_age_secs: float
+    "How long the frame's data waited in the jitter buffer before decoding started."
+
+
+def _nal_type(data: bytes, index: int) -> int:
+    "The type of the NAL unit whose start code is at index, or -1."
+    if index == -1 or index + 3 >= len(data):
+        return -1
+    return data[index + 3] & 0x1F
+
+
+class VideoReceiver:
+    """
+    Receives the Tello's H.264 stream over UDP and decodes it with as little buffering as possible.
+
+    A replacement for djitellopy's BackgroundFrameRead for latency sensitive consumers:
+
+    - Frames are assembled from datagrams and handed to the decoder as soon as the short
+      datagram that ends them arrives, without waiting for the next frame's start code.
+    - The jitter buffer between the socket and the decoder holds at most
+      jitter_buffer_frames frames. When the decoder falls that far behind the buffer is
+      flushed and decoding resumes at the next key frame.
+    - Only the newest frame of every decoder pass is converted to an array and published.
+      Consumers always get the newest frame and skip the ones they were too slow for.
+
+    Decode time and queue age are recorded per frame and summarised by get_stats.
+    The same wait_for_next_frame API as SequencedFrameReader is offered.
+
+    djitellopy's own frame reader listens on the same port, so do not call
+    get_frame_read while a receiver is running. Replay a recorded stream with
+    simulator/tello_simulator.py --video-file to try it without a drone.
+    """
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 11111,
+        decode_threads: int = 1,
+        thread_type: str = "SLICE",
+        jitter_buffer_frames: int = 4,
+        max_datagram_bytes: int = MAX_UDP_PAYLOAD,
+    ):
+        """
+        Args:
+            decode_threads: The decoder thread count. 0 lets FFmpeg decide.
+            thread_type: 'SLICE' adds no latency. 'FRAME' scales better but delays
+                every frame by one frame per extra thread.
+            jitter_buffer_frames: The number of undecoded frames after which the buffer is flushed.
+            max_datagram_bytes: The datagram size the sender splits frames at.
+        """
+        self.host = host
+        self.port = port
+        self.decode_threads = decode_threads
+        self.thread_type = thread_type
+        self.jitter_buffer_frames = jitter_buffer_frames
+        self.max_datagram_bytes = max_datagram_bytes
+
+        self._socket: Optional[socket.socket] = None
+        self._condition = threading.Condition()
+        self._buffer: Deque[Tuple[float, bytes]] = deque()
+        self._resync = False
+        self._latest: Optional[DecodedFrame] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        self.decode_time = LatencyHistogram()
+        self.queue_age = LatencyHistogram()
+        self.frames_received = 0
+        self.frames_decoded = 0
+        self.frames_published = 0
+        self.frames_flushed = 0
+        "Frames dropped from the jitter buffer because the decoder fell behind."
+        self.decode_errors = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        "The address the receiver listens on, with the actual port once started."
+        if self._socket is None:
+            return self.host, self.port
+        return self._socket.getsockname()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def start(self) -> "VideoReceiver":
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.settimeout(0.5)
+        self._stop.clear()
+        for target, name in (
+            (self._receive_loop, "receive"),
+            (self._decode_loop, "decode"),
+        ):
+            thread = threading.Thread(
+                target=target, name=f"VideoReceiver-{name}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        LOGGER.info(f"Receiving video on {self.address}")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(1)
+        self._threads = []
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def __enter__(self) -> "VideoReceiver":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _receive_loop(self) -> None:
+        assert self._socket is not None
+        chunks: List[bytes] = []
+        last_nal_type = -1
+        while not self._stop.is_set():
+            try:
+                data = self._socket.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            chunks.append(data)
+            nal_type = _nal_type(data, data.rfind(b"\x00\x00\x01"))
+            if nal_type != -1:
+                last_nal_type = nal_type
+            # Parameter sets and SEI arrive on their own but cannot be decoded alone,
+            # so a frame only ends with a short datagram of picture data
+            if len(data) >= self.max_datagram_bytes or last_nal_type not in (1, 5):
+                continue
+
+            access_unit = b"".join(chunks)
+            chunks = []
+            last_nal_type = -1
+            with self._condition:
+                self.frames_received += 1
+                if len(self._buffer) >= self.jitter_buffer_frames:
+                    # Decoding the backlog would only add latency. Skip to the next key frame
+                    self.frames_flushed += len(self._buffer)
+                    self._buffer.clear()
+                    self._resync = True
+                self._buffer.append((time.monotonic(), access_unit))
+                self._condition.notify()
+
+    def _create_codec(self):
+        codec = av.CodecContext.create("h264", "r")
+        codec.thread_count = self.decode_threads
+        codec.thread_type = self.thread_type
+        return codec
+
+    def _decode_loop(self) -> None:
+        codec = self._create_codec()
+        seq = 0
+        while not self._stop.is_set():
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._buffer or self._stop.is_set(), 0.5
+                )
+                batch = list(self._buffer)
+                self._buffer.clear()
+                resync = self._resync
+                self._resync = False
+
+            newest = None
+            for received_at, access_unit in batch:
+                if resync:
+                    # Frames after a gap can only be decoded from a key frame, or its SPS
+                    start_code = access_unit.find(b"\x00\x00\x01")
+                    if _nal_type(access_unit, start_code) not in (5, 7):
+                        with self._condition:
+                            self.frames_flushed += 1
+                        continue
+                    resync = False
+
+                start = time.monotonic()
+                try:
+                    frames = codec.decode(av.Packet(access_unit))
+                except av.error.FFmpegError as e:
+                    self.decode_errors += 1
+                    LOGGER.debug(f"Could not decode frame: {e}")
+                    continue
+                decode_secs = time.monotonic() - start
+                for frame in frames:
+                    self.frames_decoded += 1
+                    self.decode_time.record(decode_secs)
+                    self.queue_age.record(start - received_at)
+                    newest = (frame, decode_secs, start - received_at)
+
+            if resync:
+                # No key frame in this batch yet, keep skipping in the next one
+                with self._condition:
+                    self._resync = True
+            if newest is None:
+                continue
+
+            # Only the newest frame of the pass is worth converting
+            frame, decode_secs, queue_age_secs = newest
+            image = frame.to_ndarray(format="rgb24")
+            seq += 1
+            with self._condition:
+                self._latest = DecodedFrame(
+                    seq, time.monotonic(), image, decode_secs, queue_age_secs
+                )
+                self.frames_published += 1
+                self._condition.notify_all()
+
+    def latest(self) -> Optional[DecodedFrame]:
+        "The newest frame, or None if no frame was decoded yet."
+        with self._condition:
+            return self._latest
+
+    def wait_for_next_frame(
+        self, after_seq: int = 0, timeout: Optional[float] = None
+    ) -> Optional[DecodedFrame]:
+        """
+        Blocks until a frame newer than after_seq is decoded.
+
+        Returns:
+            Optional[DecodedFrame]: The newest frame, or None on timeout or stop.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._has_frame_after(after_seq) or self._stop.is_set(), timeout
+            )
+            latest = self._latest
+        if latest is None or latest.seq <= after_seq:
+            return None
+        return latest
+
+    def _has_frame_after(self, seq: int) -> bool:
+        return self._latest is not None and self._latest.seq > seq
+
+    def get_stats(self) -> dict:
+        return {
+            "frames_received": self.frames_received,
+            "frames_decoded": self.frames_decoded,
+            "frames_published": self.frames_published,
+            "frames_flushed": self.frames_flushed,
+            "decode_errors": self.decode_errors,
+            "decode_secs": self.decode_time.to_dict(percentiles=(50, 99)),
+            "queue_age_secs": self.queue_age.to_dict(percentiles=(50, 99)),
+        }
@@ -0,0 +1,476 @@
+"""
+A local stand-in for the Tello drone that speaks the Tello SDK text protocol.
+
+- Commands are received on the command port (8889) and answered the way the drone does.
+- State packets are sent to the client's state port (8890) at 10 Hz once the client sent 'command'.
+- After 'streamon' a video feed is sent to the client's video port (11111). When an H.264
+  elementary stream file is given it is replayed NAL unit by NAL unit at the given frame
+  rate, otherwise a raw grey scale test pattern is sent (see RAW_FRAME_HEADER).
+
+Round trip time, packet loss and the duration of every command are configurable, so
+latency and throughput benchmarks can run on a plain Linux box without a drone.
+
+djitellopy binds its local ports 8889 and 8890 on all interfaces and sends to a single
+drone address, so the simulator cannot run next to a djitellopy client on the same
+network stack. To use it with the scripts, run it on another host or in its own network
+namespace and pass that address to the scripts with --host (see the README). The
+AsyncTelloConnector and the swarm connector can talk to it on 127.0.0.1 directly.
+
+Usage:
+    python simulator/tello_simulator.py --port 8889 --rtt-ms 20 --loss 0.01 --duration takeoff=3
+"""
+
+import argparse
+import logging
+import queue
+import random
+import socket
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+RAW_FRAME_HEADER = struct.Struct("!IHHHH")
+"Header of a raw test frame chunk: frame number, chunk index, chunk count, width, height."
+
+MAX_UDP_PAYLOAD = 1460
+
+DEFAULT_COMMAND_DURATIONS_SECS: Dict[str, float] = {
+    "takeoff": 5.0,
+    "land": 3.0,
+    "flip": 1.5,
+    "streamon": 0.3,
+    "streamoff": 0.1,
+}
+
+
+def iter_h264_nal_units(data: bytes) -> Iterator[bytes]:
+    "Splits an H.264 elementary stream into NAL units, keeping their start codes."
+    starts: List[int] = []
+    index = data.find(b"\x00\x00\x01")
+    while index != -1:
+        # Include the leading zero of a four byte start code
+        starts.append(index - 1 if index > 0 and data[index - 1] == 0 else index)
+        index = data.find(b"\x00\x00\x01", index + 3)
+    for start, end in zip(starts, starts[1:] + [len(data)]):
+        yield data[start:end]
+
+
+def is_vcl_nal_unit(nal_unit: bytes) -> bool:
+    "True for NAL units that carry picture data, which end a frame in the Tello's stream."
+    header_index = nal_unit.find(b"\x00\x00\x01") + 3
+    if header_index >= len(nal_unit):
+        return False
+    return nal_unit[header_index] & 0x1F in (1, 5)
+
+
+class TelloSimulator:
+    """
+    Simulates a single Tello drone on a local UDP port.
+
+    Several simulators can run in one process on different ports, which is how
+    the swarm benchmarks simulate many drones.
+
+    Args:
+        host: The address to listen on.
+        command_port: The port to receive commands on.
+        state_port: The client port that state packets are sent to.
+        video_port: The client port that the video feed is sent to.
+        rtt_secs: The simulated round trip time of the link.
+        loss: The probability that a packet is lost, in either direction.
+        command_durations_secs: How long each command takes before it is acknowledged.
+            Keys are the command names, e.g. 'takeoff' or 'flip'.
+        video_file: An H.264 elementary stream to replay. A raw test pattern is sent if omitted.
+        fps: The frame rate of the video feed.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        command_port: int = 8889,
+        state_port: int = 8890,
+        video_port: int = 11111,
+        rtt_secs: float = 0.0,
+        loss: float = 0.0,
+        command_durations_secs: Optional[Dict[str, float]] = None,
+        video_file: Optional[str] = None,
+        fps: float = 30,
+        raw_frame_size: Tuple[int, int] = (320, 240),
+        seed: Optional[int] = None,
+    ):
+        self.host = host
+        self.command_port = command_port
+        self.state_port = state_port
+        self.video_port = video_port
+        self.rtt_secs = rtt_secs
+        self.loss = loss
+        self.command_durations_secs = dict(DEFAULT_COMMAND_DURATIONS_SECS)
+        if command_durations_secs:
+            self.command_durations_secs.update(command_durations_secs)
+        self.video_file = video_file
+        self.fps = fps
+        self.raw_frame_size = raw_frame_size
+        self._random = random.Random(seed)
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, command_port))
+        self.command_port = self._socket.getsockname()[1]
+        self._out_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        self._commands: "queue.Queue[Optional[Tuple[str, Tuple[str, int]]]]" = (
+            queue.Queue()
+        )
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+        self.client: Optional[Tuple[str, int]] = None
+        self.sdk_mode = False
+        self.flying = False
+        self.stream_on = False
+        self.speed_cm_s = 10
+        self.battery = 100
+        self.height_cm = 0
+        self.yaw = 0
+        self.rc = (0, 0, 0, 0)
+        self._takeoff_time: Optional[float] = None
+
+        self.received = 0
+        self.dropped = 0
+        self.rc_received = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.host, self.command_port
+
+    def start(self) -> "TelloSimulator":
+        for target, name in (
+            (self._receive_loop, "receiver"),
+            (self._command_loop, "commands"),
+            (self._state_loop, "state"),
+            (self._video_loop, "video"),
+        ):
+            thread = threading.Thread(
+                target=target,
+                name=f"TelloSimulator-{self.command_port}-{name}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+        LOGGER.info(f"Tello simulator listening on {self.address}")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._commands.put(None)
+        try:
+            # Wake up the blocking receiver
+            self._out_socket.sendto(b"", self.address)
+        except OSError:
+            pass
+        for thread in self._threads:
+            thread.join(1)
+        self._socket.close()
+        self._out_socket.close()
+
+    def __enter__(self) -> "TelloSimulator":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _lost(self) -> bool:
+        return self.loss > 0 and self._random.random() < self.loss
+
+    def _send(self, payload: bytes, address: Tuple[str, int]) -> None:
+        if self._lost():
+            self.dropped += 1
+            return
+        try:
+            self._out_socket.sendto(payload, address)
+        except OSError as e:
+            LOGGER.debug(f"Could not send to {address}: {e}")
+
+    def _reply(self, response: str, address: Tuple[str, int]) -> None:
+        # Responses leave from the command port like on the real drone
+        time.sleep(self.rtt_secs / 2)
+        if self._lost():
+            self.dropped += 1
+            return
+        try:
+            self._socket.sendto(response.encode("utf-8"), address)
+        except OSError as e:
+            LOGGER.debug(f"Could not reply to {address}: {e}")
+
+    def _receive_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data, address = self._socket.recvfrom(1024)
+            except OSError:
+                break
+            if self._stop.is_set():
+                break
+            if not data:
+                continue
+            self.received += 1
+            if self._lost():
+                self.dropped += 1
+                continue
+            command = data.decode("utf-8", errors="replace").strip()
+
+            # rc and emergency are handled as they arrive, like on the drone
+            if command.startswith("rc "):
+                self._handle_rc(command)
+            elif command == "emergency":
+                with self._lock:
+                    self.flying = False
+                    self.height_cm = 0
+                    self.rc = (0, 0, 0, 0)
+            else:
+                self._commands.put((command, address))
+
+    def _handle_rc(self, command: str) -> None:
+        self.rc_received += 1
+        try:
+            values = tuple(int(v) for v in command.split()[1:5])
+        except ValueError:
+            return
+        if len(values) == 4:
+            with self._lock:
+                self.rc = values  # type: ignore
+
+    def _command_loop(self) -> None:
+        while True:
+            item = self._commands.get()
+            if item is None or self._stop.is_set():
+                break
+            command, address = item
+            time.sleep(self.rtt_secs / 2)
+            with self._lock:
+                self.client = address
+            response = self._execute(command)
+            if response is not None:
+                self._reply(response, address)
+
+    def _wait(self, name: str) -> None:
+        duration = self.command_durations_secs.get(name, 0.0)
+        if duration > 0:
+            self._stop.wait(duration)
+
+    def _execute(self, command: str) -> Optional[str]:
+        parts = command.split()
+        name = parts[0] if parts else ""
+
+        if name == "command":
+            self.sdk_mode = True
+            return "ok"
+        if not self.sdk_mode:
+            return None
+
+        if name.endswith("?"):
+            return self._query(name)
+        if name == "takeoff":
+            self._wait(name)
+            with self._lock:
+                self.flying = True
+                self.height_cm = 80
+                self._takeoff_time = time.monotonic()
+            return "ok"
+        if name == "land":
+            self._wait(name)
+            with self._lock:
+                self.flying = False
+                self.height_cm = 0
+            return "ok"
+        if name == "flip":
+            direction = parts[1] if len(parts) == 2 else None
+            if not self.flying or direction not in {"l", "r", "f", "b"}:
+                return "error"
+            self._wait(name)
+            return "ok"
+        if name == "speed":
+            try:
+                speed = int(parts[1])
+            except (IndexError, ValueError):
+                return "error"
+            if not 10 <= speed <= 100:
+                return "error"
+            self.speed_cm_s = speed
+            return "ok"
+        if name in ("streamon", "streamoff"):
+            self._wait(name)
+            self.stream_on = name == "streamon"
+            return "ok"
+        if name in ("keepalive", "motoron", "motoroff"):
+            return "ok"
+        return f"unknown command: {command}"
+
+    def _query(self, name: str) -> str:
+        with self._lock:
+            flight_time = (
+                int(time.monotonic() - self._takeoff_time)
+                if self.flying and self._takeoff_time is not None
+                else 0
+            )
+            return {
+                "battery?": str(self.battery),
+                "speed?": str(self.speed_cm_s),
+                "time?": f"{flight_time}s",
+                "height?": f"{self.height_cm // 10}dm",
+                "temp?": "60~62C",
+                "attitude?": f"pitch:0;roll:0;yaw:{self.yaw};",
+                "baro?": "100.0",
+                "tof?": f"{max(self.height_cm * 10, 100)}mm",
+                "wifi?": "90",
+                "sdk?": "20",
+                "sn?": f"0TQSIM{self.command_port:05d}",
+            }.get(name, f"unknown command: {name}")
+
+    def get_state_packet(self) -> str:
+        "The state string the drone broadcasts, in the SDK's key:value; format."
+        with self._lock:
+            right, forward, up, yaw_rate = self.rc if self.flying else (0, 0, 0, 0)
+            flight_time = (
+                int(time.monotonic() - self._takeoff_time)
+                if self.flying and self._takeoff_time is not None
+                else 0
+            )
+            return (
+                "mid:-1;x:0;y:0;z:0;mpry:0,0,0;"
+                f"pitch:{-forward // 10};roll:{right // 10};yaw:{self.yaw};"
+                f"vgx:{forward // 10};vgy:{right // 10};vgz:{-up // 10};"
+                "templ:60;temph:62;"
+                f"tof:{max(self.height_cm, 10)};h:{self.height_cm};"
+                f"bat:{self.battery};baro:{100 + self.height_cm / 100:.2f};"
+                f"time:{flight_time};"
+                "agx:0.00;agy:0.00;agz:-1000.00;\r\n"
+            )
+
+    def _state_loop(self) -> None:
+        period = 0.1
+        next_deadline = time.monotonic()
+        while not self._stop.wait(max(0.0, next_deadline - time.monotonic())):
+            next_deadline += period
+            with self._lock:
+                if self.flying:
+                    # Integrate the RC vector so state packets react to control
+                    _, _, up, yaw_rate = self.rc
+                    self.height_cm = max(0, self.height_cm + up * period)
+                    self.height_cm = int(self.height_cm)
+                    self.yaw = int((self.yaw + yaw_rate * period + 180) % 360 - 180)
+                client = self.client
+            if client is None or not self.sdk_mode:
+                continue
+            self._send(
+                self.get_state_packet().encode("ascii"), (client[0], self.state_port)
+            )
+
+    def _video_loop(self) -> None:
+        frame_period = 1 / self.fps
+        nal_units: List[bytes] = []
+        if self.video_file:
+            with open(self.video_file, "rb") as f:
+                nal_units = list(iter_h264_nal_units(f.read()))
+            LOGGER.info(f"Loaded {len(nal_units)} NAL units from {self.video_file}")
+
+        frame_number = 0
+        nal_index = 0
+        next_deadline = time.monotonic()
+        while not self._stop.is_set():
+            client = self.client
+            if not self.stream_on or client is None:
+                self._stop.wait(0.05)
+                next_deadline = time.monotonic()
+                continue
+            destination = (client[0], self.video_port)
+
+            if nal_units:
+                # Send NAL units until one that completes a frame
+                while True:
+                    nal_unit = nal_units[nal_index]
+                    nal_index = (nal_index + 1) % len(nal_units)
+                    for offset in range(0, len(nal_unit), MAX_UDP_PAYLOAD):
+                        end = offset + MAX_UDP_PAYLOAD
+                        self._send(nal_unit[offset:end], destination)
+                    if is_vcl_nal_unit(nal_unit):
+                        break
+            else:
+                self._send_raw_frame(frame_number, destination)
+
+            frame_number += 1
+            next_deadline += frame_period
+            self._stop.wait(max(0.0, next_deadline - time.monotonic()))
+
+    def _send_raw_frame(self, frame_number: int, destination: Tuple[str, int]) -> None:
+        width, height = self.raw_frame_size
+        # A vertical bar that moves one column per frame over a horizontal gradient
+        bar = frame_number % width
+        row = bytearray(x * 255 // width for x in range(width))
+        bar_end = bar + 8
+        row[bar:bar_end] = b"\xff" * len(row[bar:bar_end])
+        frame = bytes(row) * height
+
+        chunk_size = MAX_UDP_PAYLOAD - RAW_FRAME_HEADER.size
+        chunk_count = (len(frame) + chunk_size - 1) // chunk_size
+        for index in range(chunk_count):
+            header = RAW_FRAME_HEADER.pack(
+                frame_number, index, chunk_count, width, height
+            )
+            start = index * chunk_size
+            end = start + chunk_size
+            self._send(header + frame[start:end], destination)
+
+
+def parse_durations(values: Optional[List[str]]) -> Dict[str, float]:
+    durations: Dict[str, float] = {}
+    for value in values or []:
+        name, _, secs = value.partition("=")
+        durations[name] = float(secs)
+    return durations
+
+
+if __name__ == "__main__":
+    args = argparse.ArgumentParser()
+    args.add_argument("--host", default="127.0.0.1")
+    args.add_argument("--port", type=int, default=8889)
+    args.add_argument("--state-port", type=int, default=8890)
+    args.add_argument("--video-port", type=int, default=11111)
+    args.add_argument("--rtt-ms", type=float, default=0.0)
+    args.add_argument("--loss", type=float, default=0.0, help="Packet loss in [0, 1]")
+    args.add_argument(
+        "--duration",
+        action="append",
+        help="Command duration, e.g. takeoff=5. Can be given multiple times",
+    )
+    args.add_argument("--video-file", help="H.264 elementary stream to replay")
+    args.add_argument("--fps", type=float, default=30)
+    args.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+    )
+    parsed_args = args.parse_args()
+    logging.basicConfig(level=parsed_args.log_level)
+
+    simulator = TelloSimulator(
+        host=parsed_args.host,
+        command_port=parsed_args.port,
+        state_port=parsed_args.state_port,
+        video_port=parsed_args.video_port,
+        rtt_secs=parsed_args.rtt_ms / 1000,
+        loss=parsed_args.loss,
+        command_durations_secs=parse_durations(parsed_args.duration),
+        video_file=parsed_args.video_file,
+        fps=parsed_args.fps,
+    )
+    simulator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
@@ -5,6 +5,9 @@ import cv2
 from face_tracking.image_drawing_service import ImageDrawingService
 from face_tracking.image_compression_service import ImageCompressionService
 from face_tracking.recognition_face_identifier import RecognitionFaceIdentifier
+from face_tracking.roi_face_identifier import RoiFaceIdentifier
+from face_tracking.tracking_face_identifier import TrackingFaceIdentifier
+from face_tracking.detection_worker import DetectionWorker
 from face_tracking.open_cv_wrapper import OpenCvWrapper
 from djitellopy import Tello
 import logging
@@ -17,10 +20,18 @@ from face_tracking.utils.positioning_utils import (
 )
 from services.tello_command_dispatcher import TelloCommandDispatcher
 from services.tello_connector import TelloConnector
+from services.rc_transmitter import RcTransmitter
+from services.realtime_loop import RealtimeLoop
 from follow_face_controller import FaceFollowingController
 
 
 args = argparse.ArgumentParser()
+args.add_argument(
+    "--host",
+    default=Tello.TELLO_IP,
+    help=f"Specify the address of the drone or the simulator (default: {Tello.TELLO_IP})",
+)
+parsed_args = args.parse_args()
 
 logging.basicConfig(level=logging.ERROR)
 
@@ -29,22 +40,39 @@ LOGGER = logging.getLogger(__name__)
 # Variables
 ZERO_DEPTH_BOX_SIZE = 400
 DEPTH_TARGET = 650
+CONTROL_RATE_HZ = 30
+"The control loop runs at this fixed rate, independent of the detection rate."
+MAX_FRAME_AGE_SECS = 0.3
+"Hover instead of steering on a frame older than this, and do not detect faces on it."
+RC_RATE_HZ = 20
+DETECT_EVERY_FRAMES = 10
+"Run the full face detector on every n-th frame and track the faces in between."
 
 open_cv = OpenCvWrapper()
 
 image_compressor = ImageCompressionService(open_cv)
 
-face_identifier = RecognitionFaceIdentifier(open_cv, image_compressor)
+# The detector first searches around the last known face and tracks it in between
+roi_identifier = RoiFaceIdentifier(RecognitionFaceIdentifier(open_cv, image_compressor))
+face_identifier = TrackingFaceIdentifier(
+    roi_identifier,
+    open_cv,
+    detect_every=DETECT_EVERY_FRAMES,
+)
 
 image_drawer = ImageDrawingService(open_cv)
 
-_tello = Tello()
+# Load the models and run the slow first inference before the drone is in the air
+LOGGER.info(f"Face detector warmed up in {face_identifier.warm_up():.2f}s")
+
+_tello = Tello(parsed_args.host)
 tello_service = TelloConnector(_tello)
 tello_service.connect()
 
 tello_service.streamon()
 
 dispatcher = TelloCommandDispatcher(tello_service)
+transmitter = RcTransmitter(dispatcher, RC_RATE_HZ, MAX_FRAME_AGE_SECS)
 
 controller = FaceFollowingController()
 
@@ -58,24 +86,37 @@ tello_service.take_off()
 
 # Set the speed of the drone really low
 tello_service.set_speed_cm_s(10)
+transmitter.start()
 
 
-while True:
-    time.sleep(0.001)
+# Faces are detected on a background thread, always on the newest frame
+detection_worker = DetectionWorker(
+    face_identifier, tello_service.get_sequenced_frame_read(), MAX_FRAME_AGE_SECS
+).start()
 
-    cam_output = tello_service.get_frame_read()
+detection_seq = 0
+loop = RealtimeLoop(1 / CONTROL_RATE_HZ, name="follow face")
 
-    frame = cam_output.frame
 
-    if frame is None or frame.size == 0 or frame.shape[0] == 0 or frame.shape[1] == 0:
-        LOGGER.debug("No frame")
-        continue
+def control_step() -> bool:
+    "Steers towards the closest face of the newest detection. Returns False when 'q' is pressed."
+    global detection_seq
+    detection = detection_worker.latest()
+    if detection is None or detection.frame_seq == detection_seq:
+        # Nothing new. The transmitter hovers once the last state is too old
+        return open_cv.listen_for_key(1) & 0xFF != ord("q")
+    detection_seq = detection.frame_seq
+    LOGGER.debug(
+        f"Detection on frame {detection.frame_seq} is {detection.age_secs * 1000:.0f}ms old"
+    )
 
-    faces_trbl = face_identifier.identify_faces(frame)
+    faces_trbl = detection.faces
     if not faces_trbl:
         LOGGER.debug("No faces")
-        continue
+        return open_cv.listen_for_key(1) & 0xFF != ord("q")
 
+    # The frame is shared with the video reader, draw on a copy
+    frame = detection.frame.copy()
     frame_center_xyz = (*get_frame_center_xy(frame), DEPTH_TARGET)
 
     closest = None
@@ -125,10 +166,22 @@ while True:
     )
     open_cv.show_image("frame", frame)
 
-    dispatcher.send_commands(control_state)
+    # The velocity is only valid while the frame it was computed from is recent
+    transmitter.submit(control_state, detection.frame_timestamp)
+
+    return open_cv.listen_for_key(1) & 0xFF != ord("q")
+
 
-    if open_cv.listen_for_key(1) & 0xFF == ord("q"):
-        break
+try:
+    loop.run(control_step)
+finally:
+    detection_worker.stop()
+    transmitter.stop()
+    LOGGER.info(f"Follow face loop stats: {loop.get_stats()}")
+    LOGGER.info(f"Detection worker stats: {detection_worker.get_stats()}")
+    LOGGER.info(f"Face tracking stats: {face_identifier.get_stats()}")
+    LOGGER.info(f"Face search window stats: {roi_identifier.get_stats()}")
+    LOGGER.info(f"RC transmitter stats: {transmitter.get_stats()}")
 
 tello_service.streamoff()
 
@@ -24,7 +24,7 @@ def run_adapter_test(contoller: TelloController) -> None:
 
         # Print the TelloControlState object
         print("TelloControlState:")
-        state_dict = tello_control_state.__dict__
+        state_dict = tello_control_state.to_dict()
         print_state(state_dict)
 
         time.sleep(0.1)